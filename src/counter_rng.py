@@ -0,0 +1,109 @@
+"""
+Counter-based random streams for reproducible, shardable simulations.
+
+Draw number i of a CounterRNG stream is a pure function of the seed and i
+(one 32-bit half of a Philox4x64 output for the counter i // 8), so a stream
+can be positioned at any draw without generating the draws before it. Every
+draw consumes exactly one 32-bit value whatever its range, which is what lets
+a simulation jump straight to test k: test k always uses draws
+k * draws_per_test onwards.
+"""
+import numpy as np
+
+# Philox4x64 turns every counter value into four 64-bit outputs, which are
+# used as eight 32-bit draws
+DRAWS_PER_COUNTER = 8
+
+# Largest range a single draw can cover. A draw is mapped to a range by
+# multiply-shift, which makes some values one draw in 2**32 more likely than
+# others; keeping the range to 2**20 holds that relative bias below 2**-12.
+# Rejection sampling would remove the bias but not use a fixed number of
+# draws per value, which skip-ahead relies on.
+MAX_SPAN = 1 << 20
+
+# Buffered draws kept for scalar draws (randint), so the pure-Python
+# simulators don't pay a NumPy call per door
+SCALAR_BUFFER_SIZE = 4096
+
+class CounterRNG:
+    """
+    Seeded Philox stream with skip-ahead.
+
+    Offers the subset of the random.Random and numpy Generator interfaces the
+    simulators use (randint and integers), so it can be passed wherever they
+    take an rng. Both map a draw to a range the same way, so the pure-Python
+    and vectorized simulators see identical doors for the same seed.
+    """
+    def __init__(self, seed: int, position: int = 0):
+        """
+        @param seed: Master seed; the Philox key is derived from it
+        @param position: Index of the first draw to return
+        """
+        self.seed = seed
+        self.key = np.random.SeedSequence(seed).generate_state(2, np.uint64)
+        self.seek(position)
+
+    def seek(self, position: int) -> None:
+        """
+        Position the stream so that the next draw is draw number position.
+        Costs the same for any position.
+        """
+        if position < 0:
+            raise ValueError("Stream position must be non-negative")
+        counter, skip = divmod(position, DRAWS_PER_COUNTER)
+        self.bit_generator = np.random.Philox(key=self.key, counter=counter)
+        self._buffer = self.bit_generator.random_raw(DRAWS_PER_COUNTER // 2).view(np.uint32)
+        self._index = skip
+        self.position = position
+
+    def draws(self, size: int) -> np.ndarray:
+        """
+        The next size raw 32-bit draws.
+        """
+        buffered = self._buffer[self._index:self._index + size]
+        self._index += buffered.size
+        self.position += size
+        missing = size - buffered.size
+        if missing == 0:
+            return buffered
+
+        fresh = self.bit_generator.random_raw((missing + 1) // 2).view(np.uint32)
+        if missing % 2:
+            # Keep the unused half of the last output for the next draw
+            self._buffer = fresh
+            self._index = missing
+            fresh = fresh[:missing]
+        return np.concatenate((buffered, fresh)) if buffered.size else fresh
+
+    def integers(self, low: int, high: int, size=None, dtype=np.int64, endpoint: bool = False):
+        """
+        Uniform integers from low to high (inclusive if endpoint), one draw
+        each, with the same signature as numpy.random.Generator.integers.
+        """
+        span = high - low + (1 if endpoint else 0)
+        if not 0 < span <= MAX_SPAN:
+            raise ValueError(f"CounterRNG ranges must hold between 1 and {MAX_SPAN} values")
+        shape = () if size is None else size
+        # Multiply-shift maps a draw to the range with a single draw, unlike
+        # rejection sampling; the bias is below span / 2**32 <= 2**-12 per value.
+        values = self.draws(int(np.prod(shape))).astype(np.uint64)
+        values *= np.uint64(span)
+        values >>= np.uint64(32)
+        values = values.astype(dtype)
+        values += dtype(low)
+        return values.reshape(shape) if size is not None else values[0]
+
+    def randint(self, low: int, high: int) -> int:
+        """
+        Uniform integer from low to high inclusive, like random.Random.randint.
+        """
+        span = high - low + 1
+        if not 0 < span <= MAX_SPAN:
+            raise ValueError(f"CounterRNG ranges must hold between 1 and {MAX_SPAN} values")
+        if self._index >= self._buffer.size:
+            self._buffer = self.bit_generator.random_raw(SCALAR_BUFFER_SIZE // 2).view(np.uint32)
+            self._index = 0
+        draw = int(self._buffer[self._index])
+        self._index += 1
+        self.position += 1
+        return low + ((draw * span) >> 32)
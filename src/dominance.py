@@ -0,0 +1,108 @@
+"""
+Iterated elimination of dominated strategies.
+
+Works on the dense payoff arrays of Game (one per player, one axis per
+player) for any number of players. Each round removes, for every player,
+the actions some other surviving action beats against every surviving
+profile of the other players, until nothing changes.
+
+- Strict dominance (the default) never removes an action played in any
+  Nash equilibrium, pure or mixed, and the result doesn't depend on the
+  order of elimination.
+- Weak dominance (never worse, sometimes better) shrinks games further but
+  can remove equilibria, and its result can depend on the order.
+- Mixed dominance also removes actions beaten by a mixture of other actions,
+  found with one small linear program per action; like pure strict
+  dominance it keeps every equilibrium.
+"""
+from typing import List
+
+import numpy as np
+from scipy.optimize import linprog
+
+# Profiles of the other players compared first, to rule out most pairs of
+# actions before comparing them everywhere
+SCREEN_PROFILES = 16
+
+# Smallest margin by which a mixture must beat an action to dominate it
+MIXED_TOLERANCE = 1e-9
+
+def dominated_actions(payoffs: np.ndarray, weak: bool = False) -> np.ndarray:
+    """
+    Actions dominated by another action, for the player on the first axis.
+
+    @param payoffs: The player's payoffs, shape (actions, profiles of the other players)
+    @param weak: Also count weak dominance
+    @return: Boolean mask of the dominated actions
+    """
+    actions = payoffs.shape[0]
+    dominated = np.zeros(actions, dtype=bool)
+    screen = payoffs[:, :SCREEN_PROFILES]
+    for better in range(actions):
+        if dominated[better] and not weak:
+            # Strict dominance is transitive, so whatever a dominated action
+            # beats, the action beating it beats as well
+            continue
+        # Cheap pass on a few profiles, then a full check on the survivors
+        candidates = np.flatnonzero(~dominated & ((screen[better] >= screen).all(axis=1) if weak else (screen[better] > screen).all(axis=1)))
+        candidates = candidates[candidates != better]
+        if candidates.size == 0:
+            continue
+        difference = payoffs[better] - payoffs[candidates]
+        if weak:
+            beaten = (difference >= 0).all(axis=1) & (difference > 0).any(axis=1)
+        else:
+            beaten = (difference > 0).all(axis=1)
+        dominated[candidates[beaten]] = True
+    return dominated
+
+def mixed_dominated(payoffs: np.ndarray, action: int) -> bool:
+    """
+    Whether an action is strictly dominated by a mixture of the other actions.
+
+    @param payoffs: The player's payoffs, shape (actions, profiles of the other players)
+    """
+    others = np.delete(payoffs, action, axis=0)
+    if others.shape[0] == 0:
+        return False
+    count, profiles = others.shape
+    # Maximise the margin e such that the mixture beats the action by e
+    # everywhere: variables are the mixture weights, then e
+    objective = np.zeros(count + 1)
+    objective[-1] = -1
+    inequalities = np.hstack((-others.T, np.ones((profiles, 1))))
+    result = linprog(objective, A_ub=inequalities, b_ub=-payoffs[action], A_eq=[[1] * count + [0]], b_eq=[1],
+                     bounds=[(0, None)] * count + [(None, None)], method='highs')
+    return result.status == 0 and -result.fun > MIXED_TOLERANCE
+
+def iterated_elimination(payoffs: List[np.ndarray], weak: bool = False, mixed: bool = False) -> List[np.ndarray]:
+    """
+    Iteratively remove dominated actions from a game.
+
+    @param payoffs: One payoff array per player, with one axis per player
+    @param weak: Also remove weakly dominated actions
+    @param mixed: Also remove actions strictly dominated by mixtures
+    @return: For each player, the indices of the surviving actions
+    """
+    surviving = [np.arange(size) for size in payoffs[0].shape]
+    changed = True
+    while changed:
+        changed = False
+        for player, payoff in enumerate(payoffs):
+            if surviving[player].size == 1:
+                continue
+            # The player's own actions first, then every surviving profile of the others
+            reduced = np.moveaxis(payoff[np.ix_(*surviving)], player, 0)
+            reduced = reduced.reshape(reduced.shape[0], -1)
+            dominated = dominated_actions(reduced, weak)
+            if mixed:
+                alive = np.flatnonzero(~dominated)
+                for action in alive:
+                    if mixed_dominated(reduced[alive], np.searchsorted(alive, action)):
+                        dominated[action] = True
+                        # Later checks mix only the actions still standing
+                        alive = alive[alive != action]
+            if dominated.any():
+                surviving[player] = surviving[player][~dominated]
+                changed = True
+    return surviving
@@ -0,0 +1,227 @@
+"""
+Content-addressed cache of game solutions.
+
+Games are looked up by a hash of a canonical form that doesn't change when
+actions are listed in another order or a player's payoffs go through a
+positive affine transform (u -> a*u + b with a > 0), since neither changes
+the equilibria:
+
+- Each player's payoffs are rescaled to [0, 1], which removes the affine
+  transform, and keyed on their exact bits. Two games only share a key if
+  their rescaled payoffs are identical, so payoffs that differ by any amount
+  never share a key. Affine copies get the same key when rescaling rounds
+  the same way for both, as with integer payoffs and integer a and b;
+  otherwise they get different keys, which costs a miss. If rescaling would
+  merge two distinct payoffs, the raw payoffs are used instead.
+- Each player's actions are sorted by an invariant signature, refined in
+  rounds: a hash of the multiset of payoffs in the action's slice, combined
+  with the classes the other players' actions fell into the round before.
+  Actions that still tie are as a rule interchangeable; when they aren't,
+  two orderings of the same game can get different keys, which costs a
+  miss but never a wrong answer.
+
+Results are stored as canonical action positions and mapped back to the
+caller's action names on a hit. The in-memory tier is an LRU; the optional
+disk tier keeps one small JSON file per game, so it survives restarts and
+can be shared between processes.
+"""
+import os
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Version of the canonical form; bump it when the form changes, so entries
+# written by older versions are never mistaken for current ones
+CANONICAL_VERSION = 2
+
+_MULTIPLIER_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MULTIPLIER_2 = np.uint64(0x94D049BB133111EB)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """
+    SplitMix64 finalizer: a cheap, well-spread hash of uint64 values.
+    """
+    x = x ^ (x >> np.uint64(30))
+    x = x * _MULTIPLIER_1
+    x = x ^ (x >> np.uint64(27))
+    x = x * _MULTIPLIER_2
+    return x ^ (x >> np.uint64(31))
+
+@dataclass
+class CanonicalGame:
+    """A game's cache key, and how its actions map to the canonical order."""
+    key: str
+    # orders[p][k] is the caller's position of player p's canonical action k
+    orders: List[np.ndarray]
+
+def normalize(payoff: np.ndarray) -> Tuple[np.ndarray, bool]:
+    """
+    Rescale a player's payoffs to [0, 1], as the uint64 bits of the float64 values.
+
+    @return: (bits, rescaled); rescaled is False when rescaling would have
+             merged distinct payoffs and the raw payoffs were kept instead
+    """
+    payoff = np.asarray(payoff, dtype=float)
+    low, high = payoff.min(), payoff.max()
+    if high <= low:
+        return np.zeros(payoff.shape, dtype=np.uint64), True
+    # Dividing the differences (rather than multiplying by a reciprocal)
+    # gives identical results for games that are exact affine copies
+    values = np.unique(payoff)
+    if np.all(np.diff((values - low) / (high - low)) > 0):
+        # Adding 0.0 turns -0.0 into 0.0, so equal payoffs have equal bits
+        return (((payoff - low) / (high - low)) + 0.0).view(np.uint64), True
+    return (payoff + 0.0).view(np.uint64), False
+
+def canonicalize(payoffs: Sequence[np.ndarray], kind: str = 'pure') -> CanonicalGame:
+    """
+    Compute the canonical form of a game.
+
+    @param payoffs: One payoff array per player, with one axis per player
+    @param kind: What is being cached; part of the key, so different
+                 solutions of the same game don't collide
+    @return: CanonicalGame
+    """
+    normalized = [normalize(payoff) for payoff in payoffs]
+    bits = [b for b, _ in normalized]
+    shape = bits[0].shape
+    players = len(shape)
+    # Hash of all players' payoffs at each profile
+    cells = np.zeros(shape, dtype=np.uint64)
+    for q in bits:
+        cells = _mix(cells + _GOLDEN + q)
+
+    labels = [np.zeros(size, dtype=np.uint64) for size in shape]
+    counts = [1] * players
+    # Each round can only split classes, so this many rounds always suffice
+    for _ in range(sum(shape)):
+        for player in range(players):
+            profile = cells
+            for other in range(players):
+                if other != player:
+                    index = [np.newaxis] * players
+                    index[other] = slice(None)
+                    profile = _mix(profile + labels[other][tuple(index)])
+            others = tuple(axis for axis in range(players) if axis != player)
+            # Wrapping sums are exact, so the signature doesn't depend on the
+            # order the slice is summed in
+            signature = _mix(profile.sum(axis=others, dtype=np.uint64) + _mix(labels[player]))
+            _, labels[player] = np.unique(signature, return_inverse=True)
+            labels[player] = labels[player].astype(np.uint64)
+        new_counts = [int(label.max()) + 1 if label.size else 0 for label in labels]
+        # Done once refining stops splitting classes, or every action has its own
+        if new_counts == counts or new_counts == list(shape):
+            break
+        counts = new_counts
+
+    orders = [np.argsort(label, kind='stable') for label in labels]
+    rescaled = ''.join('1' if flag else '0' for _, flag in normalized)
+    digest = hashlib.sha256(f"{CANONICAL_VERSION}:{kind}:{shape}:{rescaled}".encode())
+    for q in bits:
+        digest.update(np.ascontiguousarray(q[np.ix_(*orders)], dtype='<u8').tobytes())
+    return CanonicalGame(digest.hexdigest(), orders)
+
+class EquilibriumCache:
+    """
+    Two-tier cache of equilibria, keyed by canonical game.
+
+    Entries are lists of action profiles. Keep one cache per kind of
+    solution, or pass a distinct kind to canonicalize for each.
+    """
+    def __init__(self, maxsize: int = 1024, directory: Optional[str] = None):
+        """
+        @param maxsize: Entries kept in memory
+        @param directory: Where to keep the disk tier (default: no disk tier)
+        """
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, canonical: CanonicalGame, action_names: List[List[str]]) -> Optional[List[Tuple[str, ...]]]:
+        """
+        Look up a game.
+
+        @param canonical: The game's canonical form
+        @param action_names: The caller's action names for each player, in array order
+        @return: The cached profiles in the caller's names and order, or None on a miss
+        """
+        profiles = self._entries.get(canonical.key)
+        if profiles is not None:
+            self.hits += 1
+            self._entries.move_to_end(canonical.key)
+        else:
+            profiles = self._read(canonical.key)
+            if profiles is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(canonical.key, profiles)
+        # Back to the caller's positions, sorted as an uncached search would list them
+        positions = sorted(tuple(int(order[k]) for order, k in zip(canonical.orders, profile)) for profile in profiles)
+        return [tuple(names[i] for names, i in zip(action_names, position)) for position in positions]
+
+    def put(self, canonical: CanonicalGame, action_names: List[List[str]], equilibria: List[Tuple[str, ...]]) -> None:
+        """
+        Store the profiles found for a game, given in the caller's action names.
+        """
+        ranks = [{names[i]: k for k, i in enumerate(order)} for names, order in zip(action_names, canonical.orders)]
+        profiles = [tuple(rank[name] for rank, name in zip(ranks, profile)) for profile in equilibria]
+        self._remember(canonical.key, profiles)
+        self._write(canonical.key, profiles)
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'entries': len(self._entries),
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remember(self, key: str, profiles: List[Tuple[int, ...]]) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = profiles
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        # Two-level layout keeps directories small
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read(self, key: str) -> Optional[List[Tuple[int, ...]]]:
+        if self.directory is None:
+            return None
+        try:
+            with open(self._path(key)) as f:
+                return [tuple(profile) for profile in json.load(f)['equilibria']]
+        except (OSError, ValueError, KeyError):
+            # Missing, or left half-written by a crash: treat as a miss
+            return None
+
+    def _write(self, key: str, profiles: List[Tuple[int, ...]]) -> None:
+        if self.directory is None:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so concurrent readers never see a partial file
+        handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(handle, 'w') as f:
+            json.dump({'equilibria': [list(profile) for profile in profiles]}, f)
+        os.replace(temporary, path)
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Evolutionary dynamics of games.
+
+- Replicator dynamics: the share of each action grows in proportion to how
+  much better it does than the population average. Symmetric two-player
+  games evolve one population that plays against itself; other games get
+  one population per player. The ODE is integrated with an adaptive
+  Bogacki-Shampine (RK23) step, and each evaluation is one matrix-vector
+  product per population.
+- Moran process: a finite population where each step one individual,
+  chosen in proportion to fitness, reproduces and a uniformly chosen one
+  dies. Many independent populations advance together in arrays, which is
+  how fixation probabilities are estimated.
+
+Both yield their trajectories in chunks, so long runs can be written out as
+they go instead of being kept in memory.
+"""
+import sys
+import argparse
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from game_theory import (Game, create_battle_of_sexes, create_chicken, create_matching_pennies,
+                         create_prisoners_dilemma, create_stag_hunt, create_volunteers_dilemma)
+
+GAMES = {
+    'prisoners-dilemma': create_prisoners_dilemma,
+    'chicken': create_chicken,
+    'stag-hunt': create_stag_hunt,
+    'battle-of-sexes': create_battle_of_sexes,
+    'matching-pennies': create_matching_pennies,
+    'volunteers-dilemma': create_volunteers_dilemma,
+}
+
+# Rows per chunk of a trajectory
+DEFAULT_CHUNK_SIZE = 1000
+
+# Bogacki-Shampine step size limits, as factors of the previous step
+MIN_STEP_FACTOR = 0.2
+MAX_STEP_FACTOR = 5.0
+
+def symmetric_payoffs(game: Game) -> Optional[np.ndarray]:
+    """
+    The payoffs of a symmetric two-player game, or None if it isn't one.
+
+    @return: Array of the payoff to a player choosing action [own, opponent's]
+    """
+    payoffs = game.payoffs
+    if len(payoffs) != 2 or payoffs[0].shape[0] != payoffs[0].shape[1]:
+        return None
+    names = game.action_names()
+    if names[0] != names[1] or not np.array_equal(payoffs[0], payoffs[1].T):
+        return None
+    return np.asarray(payoffs[0], dtype=float)
+
+def expected_payoffs(payoffs: Sequence[np.ndarray], strategies: Sequence[np.ndarray]) -> List[np.ndarray]:
+    """
+    Each player's expected payoff for each of their actions, when the others play mixed strategies.
+    """
+    values = []
+    for player, payoff in enumerate(payoffs):
+        # Own actions first, then contract the other players' axes from the last
+        value = np.moveaxis(payoff, player, 0)
+        for other in reversed(range(len(strategies))):
+            if other != player:
+                value = value @ strategies[other]
+        values.append(value)
+    return values
+
+class Replicator:
+    """
+    The replicator vector field of a game, over the concatenated action shares of each population.
+    """
+    def __init__(self, game: Game, symmetric: Optional[bool] = None):
+        """
+        @param symmetric: Evolve a single population; by default, when the game is symmetric
+        """
+        matrix = symmetric_payoffs(game)
+        if symmetric and matrix is None:
+            raise ValueError("A single population needs a symmetric two-player game")
+        self.symmetric = matrix is not None if symmetric is None else symmetric
+        names = game.action_names()
+        if self.symmetric:
+            self.matrix = matrix
+            self.labels = list(names[0])
+            self.sizes = [len(names[0])]
+        else:
+            self.payoffs = [np.asarray(payoff, dtype=float) for payoff in game.payoffs]
+            self.labels = [f"{player.name}:{name}" for player, player_names in zip(game.players, names)
+                           for name in player_names]
+            self.sizes = [len(player_names) for player_names in names]
+        self.splits = np.cumsum(self.sizes)[:-1]
+
+    def split(self, state: np.ndarray) -> List[np.ndarray]:
+        return np.split(state, self.splits)
+
+    def __call__(self, state: np.ndarray) -> np.ndarray:
+        if self.symmetric:
+            fitness = [self.matrix @ state]
+        else:
+            fitness = expected_payoffs(self.payoffs, self.split(state))
+        return np.concatenate([shares * (value - shares @ value) for shares, value in zip(self.split(state), fitness)])
+
+    def project(self, state: np.ndarray) -> np.ndarray:
+        """
+        Put a state back on the simplices, undoing rounding drift.
+        """
+        state = np.clip(state, 0, None)
+        return np.concatenate([shares / shares.sum() for shares in self.split(state)])
+
+    def initial_state(self, initial: Optional[Sequence[float]] = None) -> np.ndarray:
+        """
+        Check starting action shares and scale each population's to add up to 1.
+
+        @param initial: Shares concatenated over populations (default: uniform)
+        """
+        actions = sum(self.sizes)
+        if initial is None:
+            return self.project(np.ones(actions))
+        initial = np.asarray(initial, dtype=float)
+        if initial.shape != (actions,) or not np.isfinite(initial).all() or (initial < 0).any():
+            per = f" of each population ({' + '.join(map(str, self.sizes))})" if len(self.sizes) > 1 else ''
+            raise ValueError(f"Initial shares must be {actions} non-negative numbers, one per action{per}")
+        if any(shares.sum() == 0 for shares in self.split(initial)):
+            raise ValueError("Initial shares must not all be zero for any population")
+        return self.project(initial)
+
+def replicator_dynamics(game: Game, initial: Optional[np.ndarray] = None, t_max: float = 100.0, tol: float = 1e-6,
+                        rest_tol: float = 1e-10, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        symmetric: Optional[bool] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Integrate the replicator dynamics of a game.
+
+    @param initial: Starting action shares, concatenated over populations (default: uniform)
+    @param t_max: Time to integrate up to
+    @param tol: Largest error allowed per step; the step size adapts to stay below it
+    @param rest_tol: Stop early once no share changes faster than this
+    @param chunk_size: Accepted steps per chunk
+    @param symmetric: See Replicator
+    @return: Iterator of (times, states) chunks, states having one column per action of each population
+    """
+    field = Replicator(game, symmetric)
+    state = field.initial_state(initial)
+    t, h = 0.0, 0.01
+    times, states = [t], [state]
+    slope = field(state)
+    while t < t_max and np.abs(slope).max() > rest_tol:
+        h = min(h, t_max - t)
+        # Bogacki-Shampine pair: third-order step, second-order error estimate
+        k2 = field(state + 0.5 * h * slope)
+        k3 = field(state + 0.75 * h * k2)
+        proposed = state + h * (2 / 9 * slope + 1 / 3 * k2 + 4 / 9 * k3)
+        k4 = field(proposed)
+        error = np.abs(h * (-5 / 72 * slope + 1 / 12 * k2 + 1 / 9 * k3 - 1 / 8 * k4)).max()
+        if error <= tol:
+            t += h
+            state = field.project(proposed)
+            slope = field(state)
+            times.append(t)
+            states.append(state)
+            if len(times) == chunk_size:
+                yield np.array(times), np.array(states)
+                times, states = [], []
+        factor = MAX_STEP_FACTOR if error == 0 else 0.9 * (tol / error) ** (1 / 3)
+        h *= min(MAX_STEP_FACTOR, max(MIN_STEP_FACTOR, factor))
+    if times:
+        yield np.array(times), np.array(states)
+
+def moran_initial(game: Game, population_size: int,
+                  initial: Optional[Sequence[int]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Check that a game and starting counts can start a Moran process.
+
+    @return: (payoff matrix of the symmetric game, starting count of each action)
+    """
+    matrix = symmetric_payoffs(game)
+    if matrix is None:
+        raise ValueError("The Moran process needs a symmetric two-player game")
+    if population_size < 2:
+        raise ValueError("Populations need at least two individuals")
+    actions = matrix.shape[0]
+    if initial is None:
+        initial = np.full(actions, population_size // actions)
+        initial[:population_size % actions] += 1
+    initial = np.asarray(initial, dtype=np.int64)
+    if initial.shape != (actions,) or (initial < 0).any() or initial.sum() != population_size:
+        raise ValueError(f"Initial counts must be {actions} non-negative numbers adding up to {population_size}")
+    return matrix, initial
+
+def moran_process(game: Game, population_size: int, populations: int, steps: int, initial: Optional[Sequence[int]] = None,
+                  selection: float = 1.0, record_every: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                  seed: int = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Run independent Moran processes of a symmetric two-player game side by side.
+
+    Fitness is exp(selection * average payoff against the rest of the
+    population), which stays positive for any payoffs; selection = 0 is neutral drift.
+
+    @param population_size: Individuals per population
+    @param populations: Number of independent populations
+    @param steps: Birth-death steps to run; stops early once every population has fixated
+    @param initial: Starting count of each action (default: as even a split as possible)
+    @param record_every: Steps between recorded states
+    @param chunk_size: Recorded states per chunk
+    @return: Iterator of (steps, counts) chunks, counts of shape (records, populations, actions)
+    """
+    matrix, initial = moran_initial(game, population_size, initial)
+    actions = matrix.shape[0]
+
+    rng = np.random.default_rng(seed)
+    counts = np.tile(initial, (populations, 1))
+    rows = np.arange(populations)
+    recorded_steps, records = [0], [counts.copy()]
+    for step in range(1, steps + 1):
+        # Average payoff against everyone else in the population
+        payoff = (counts @ matrix.T - np.diag(matrix)) / (population_size - 1)
+        # Shifting fitness exponents by a constant doesn't change the selection probabilities
+        weights = counts * np.exp(selection * (payoff - payoff.max(axis=1, keepdims=True)))
+        born = (weights.cumsum(axis=1) < rng.random((populations, 1)) * weights.sum(axis=1, keepdims=True)).sum(axis=1)
+        died = (counts.cumsum(axis=1) <= rng.integers(0, population_size, (populations, 1))).sum(axis=1)
+        # Rounding can push the birth draw past the last action
+        born = np.minimum(born, actions - 1)
+        counts[rows, born] += 1
+        counts[rows, died] -= 1
+
+        finished = (counts == population_size).any(axis=1).all()
+        if step % record_every == 0 or finished or step == steps:
+            recorded_steps.append(step)
+            records.append(counts.copy())
+            if len(records) == chunk_size:
+                yield np.array(recorded_steps), np.array(records)
+                recorded_steps, records = [], []
+        if finished:
+            break
+    if records:
+        yield np.array(recorded_steps), np.array(records)
+
+def parse_initial(text: str, integer: bool) -> Optional[list]:
+    if text is None:
+        return None
+    return [int(part) if integer else float(part) for part in text.split(',')]
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Simulate the evolutionary dynamics of a game, writing the trajectory as CSV.',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--game',
+                       choices=GAMES,
+                       default='stag-hunt',
+                       help='Game to evolve (default: stag-hunt)')
+    parser.add_argument('--moran',
+                       action='store_true',
+                       help='Run finite-population Moran processes instead of the replicator dynamics')
+    parser.add_argument('--initial',
+                       default=None,
+                       help='Comma-separated starting shares (replicator) or counts (Moran) of each action')
+    parser.add_argument('-o', '--output',
+                       default='-',
+                       help='Where to write the trajectory CSV (default: stdout)')
+    parser.add_argument('--chunk-size',
+                       type=int,
+                       default=DEFAULT_CHUNK_SIZE,
+                       help=f'Rows held in memory before they are written (default: {DEFAULT_CHUNK_SIZE})')
+    replicator = parser.add_argument_group('replicator dynamics')
+    replicator.add_argument('--t-max',
+                       type=float,
+                       default=100.0,
+                       help='Time to integrate up to (default: 100)')
+    replicator.add_argument('--tol',
+                       type=float,
+                       default=1e-6,
+                       help='Error allowed per step (default: 1e-6)')
+    replicator.add_argument('--populations-per-player',
+                       action='store_true',
+                       help='Evolve one population per player even for symmetric games')
+    moran = parser.add_argument_group('Moran process')
+    moran.add_argument('-N', '--population-size',
+                       type=int,
+                       default=100,
+                       help='Individuals per population (default: 100)')
+    moran.add_argument('-P', '--populations',
+                       type=int,
+                       default=1000,
+                       help='Independent populations (default: 1000)')
+    moran.add_argument('--steps',
+                       type=int,
+                       default=100000,
+                       help='Most birth-death steps to run (default: 100000)')
+    moran.add_argument('--selection',
+                       type=float,
+                       default=1.0,
+                       help='Intensity of selection; 0 is neutral drift (default: 1)')
+    moran.add_argument('--record-every',
+                       type=int,
+                       default=100,
+                       help='Steps between recorded states (default: 100)')
+    moran.add_argument('-s', '--seed',
+                       type=int,
+                       default=None,
+                       help='Random seed')
+    parser.add_argument('-v', '--verbose',
+                       action='store_true',
+                       help='Report progress on stderr')
+    args = parser.parse_args()
+
+    if args.chunk_size < 1 or args.record_every < 1:
+        parser.error("Chunk size and recording interval must be positive")
+    if args.t_max <= 0 or args.tol <= 0:
+        parser.error("--t-max and --tol must be positive")
+    if args.population_size < 2 or args.populations < 1 or args.steps < 0:
+        parser.error("Moran runs need at least two individuals, one population and non-negative steps")
+    try:
+        args.initial = parse_initial(args.initial, args.moran)
+    except ValueError:
+        parser.error("--initial takes comma-separated numbers")
+    game, _ = GAMES[args.game]()
+    try:
+        if args.moran:
+            moran_initial(game, args.population_size, args.initial)
+        else:
+            Replicator(game, False if args.populations_per_player else None).initial_state(args.initial)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+if __name__ == '__main__':
+    args = parse_args()
+    game, _ = GAMES[args.game]()
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w')
+
+    try:
+        if args.moran:
+            names = game.action_names()[0]
+            print(','.join(['step', 'population'] + names), file=sink)
+            final = None
+            for steps, counts in moran_process(game, args.population_size, args.populations, args.steps, args.initial,
+                                               args.selection, args.record_every, args.chunk_size, args.seed):
+                records, populations, actions = counts.shape
+                rows = np.column_stack((np.repeat(steps, populations), np.tile(np.arange(populations), records),
+                                        counts.reshape(-1, actions)))
+                np.savetxt(sink, rows, fmt='%d', delimiter=',')
+                final = steps[-1], counts[-1]
+                if args.verbose : print(f"Step {steps[-1]:,}", file=sys.stderr)
+            step, counts = final
+            fixed = counts == args.population_size
+            print(f"After {step:,} steps, of {args.populations:,} populations:", file=sys.stderr)
+            for k, name in enumerate(names):
+                print(f"  {fixed[:, k].mean():.2%} fixated on {name}", file=sys.stderr)
+            print(f"  {(~fixed.any(axis=1)).mean():.2%} still mixed", file=sys.stderr)
+        else:
+            field = Replicator(game, False if args.populations_per_player else None)
+            print(','.join(['t'] + field.labels), file=sink)
+            for times, states in replicator_dynamics(game, args.initial, args.t_max, args.tol,
+                                                     chunk_size=args.chunk_size, symmetric=field.symmetric):
+                np.savetxt(sink, np.column_stack((times, states)), fmt='%.10g', delimiter=',')
+                if args.verbose : print(f"t = {times[-1]:.4g}", file=sys.stderr)
+            final = ', '.join(f"{label} {share:.4f}" for label, share in zip(field.labels, states[-1]))
+            print(f"At t = {times[-1]:.4g}: {final}", file=sys.stderr)
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
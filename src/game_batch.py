@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Batch analyzer for files of serialized games.
+
+Reads length-delimited Game messages (each one prefixed with its size as a
+varint, the usual protobuf framing) from a file as a stream, solves them for
+their pure Nash equilibria across a process pool, and writes them back in
+the same framing with nash_equilibria filled in. Only a bounded number of
+batches are in flight at a time, so memory use doesn't grow with the file.
+Output can keep the input order, or take games as they finish.
+
+With a cache, each process keeps recently solved games in memory, and an
+optional cache directory shares solutions between processes and runs.
+"""
+import sys
+import time
+import argparse
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import BinaryIO, Iterator, List, Tuple
+
+import numpy as np
+
+from equilibrium_cache import EquilibriumCache, canonicalize
+from game_theory import ELIMINATION_MODES, Action, Game, Player
+from game_theory_pb2 import Game as GameProto
+
+# Batches queued per worker; enough to keep every worker busy
+INFLIGHT_PER_WORKER = 4
+
+# This process's equilibrium cache, if any; set by init_cache
+_cache = None
+
+def init_cache(maxsize: int, directory: str = None) -> None:
+    global _cache
+    _cache = EquilibriumCache(maxsize, directory) if maxsize > 0 or directory else None
+
+def read_varint(f: BinaryIO):
+    """
+    Read a base-128 varint, or return None at the end of the file.
+    """
+    result = shift = 0
+    while True:
+        byte = f.read(1)
+        if not byte:
+            if shift:
+                raise ValueError("Truncated record length")
+            return None
+        result |= (byte[0] & 0x7f) << shift
+        if not byte[0] & 0x80:
+            return result
+        shift += 7
+
+def encode_varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        bits = value & 0x7f
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+def read_delimited(f: BinaryIO) -> Iterator[bytes]:
+    """
+    Yield the serialized records of a length-delimited stream, one at a time.
+    """
+    while True:
+        size = read_varint(f)
+        if size is None:
+            return
+        record = f.read(size)
+        if len(record) != size:
+            raise ValueError("Truncated record")
+        yield record
+
+def write_delimited(f: BinaryIO, record: bytes) -> None:
+    f.write(encode_varint(len(record)) + record)
+
+def batches(records: Iterator[bytes], size: int) -> Iterator[List[bytes]]:
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def solve_record(record: bytes, eliminate: str = 'none') -> bytes:
+    """
+    Solve one serialized game and return it with its pure equilibria filled in.
+    """
+    message = GameProto()
+    message.ParseFromString(record)
+    game = Game.from_proto(message)
+    equilibria = None
+    if _cache is not None:
+        # Weak elimination can change the answer, so the mode is part of the key
+        canonical = canonicalize(game.payoffs, f"pure/{eliminate}")
+        equilibria = _cache.get(canonical, game.action_names())
+    if equilibria is None:
+        reduced = game
+        if eliminate != 'none':
+            reduced = game.eliminate_dominated(weak=eliminate == 'weak', mixed=eliminate == 'mixed')
+        equilibria = reduced.find_nash_equilibria()
+        if _cache is not None:
+            _cache.put(canonical, game.action_names(), equilibria)
+    # The input message is kept as it is apart from its equilibria, so
+    # nothing else in it has to be re-encoded
+    message.ClearField('nash_equilibria')
+    message.nash_equilibria.extend('/'.join(eq) for eq in equilibria)
+    # Deterministic map order, so the output doesn't depend on the worker
+    return message.SerializeToString(deterministic=True)
+
+def _solve_batch(task) -> Tuple[List[bytes], int]:
+    """
+    @return: (solved records, cache hits among them)
+    """
+    records, eliminate = task
+    hits = _cache.hits + _cache.disk_hits if _cache is not None else 0
+    results = [solve_record(record, eliminate) for record in records]
+    if _cache is not None:
+        hits = _cache.hits + _cache.disk_hits - hits
+    return results, hits
+
+def analyze_stream(source: BinaryIO, sink: BinaryIO, workers: int = 1, batch_size: int = 64, ordered: bool = True,
+                   eliminate: str = 'none', report_interval: float = 5.0, verbose: bool = False,
+                   cache_size: int = 0, cache_dir: str = None) -> Tuple[int, int]:
+    """
+    Solve every game in a stream and write the results to another.
+
+    @param workers: Worker processes; 1 solves in this process
+    @param batch_size: Games per task sent to a worker
+    @param ordered: Keep the input order; otherwise write games as they finish
+    @param report_interval: Seconds between progress reports on stderr
+    @param cache_size: Solved games each process remembers (default: no cache)
+    @param cache_dir: Directory of a disk cache shared by all processes
+    @return: (games processed, cache hits)
+    """
+    started = last_report = time.perf_counter()
+    done = hits = 0
+
+    def emit(batch: Tuple[List[bytes], int]) -> None:
+        nonlocal done, hits, last_report
+        results, batch_hits = batch
+        hits += batch_hits
+        for record in results:
+            write_delimited(sink, record)
+        done += len(results)
+        now = time.perf_counter()
+        if verbose and now - last_report >= report_interval:
+            print(f"{done:,} games, {done / (now - started):,.0f} games/sec", file=sys.stderr)
+            last_report = now
+
+    tasks = ((batch, eliminate) for batch in batches(read_delimited(source), batch_size))
+    if workers == 1:
+        init_cache(cache_size, cache_dir)
+        for task in tasks:
+            emit(_solve_batch(task))
+        return done, hits
+
+    pending = deque()
+
+    def drain(limit: int) -> None:
+        # Write results until at most limit batches are in flight
+        while len(pending) > limit:
+            if ordered:
+                emit(pending.popleft().result())
+                continue
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                pending.remove(future)
+                emit(future.result())
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_cache, initargs=(cache_size, cache_dir)) as pool:
+        for task in tasks:
+            pending.append(pool.submit(_solve_batch, task))
+            # Only a bounded number of batches are read ahead, so memory stays flat
+            drain(workers * INFLIGHT_PER_WORKER - 1)
+        drain(0)
+    return done, hits
+
+def generate_games(sink: BinaryIO, count: int, num_actions: int, seed: int = None) -> None:
+    """
+    Write random two-player games with integer payoffs, for testing and benchmarks.
+    """
+    rng = np.random.default_rng(seed)
+    players = [Player(f"Player {p}", [Action(f"a{i}") for i in range(num_actions)]) for p in (1, 2)]
+    for _ in range(count):
+        payoffs = rng.integers(0, 10, size=(2, num_actions, num_actions))
+        write_delimited(sink, Game.from_arrays(players, payoffs).to_proto().SerializeToString(deterministic=True))
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Solve a stream of length-delimited Game messages for their pure Nash equilibria.',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('input',
+                       help='File of length-delimited Game messages (- for stdin)')
+    parser.add_argument('-o', '--output',
+                       default='-',
+                       help='Where to write the solved games (default: stdout)')
+    parser.add_argument('-w', '--workers',
+                       type=int,
+                       default=1,
+                       help='Worker processes (default: 1)')
+    parser.add_argument('-b', '--batch-size',
+                       type=int,
+                       default=64,
+                       help='Games per task sent to a worker (default: 64)')
+    parser.add_argument('--unordered',
+                       action='store_true',
+                       help='Write games as they are solved instead of in input order')
+    parser.add_argument('--eliminate',
+                       choices=ELIMINATION_MODES,
+                       default='none',
+                       help='Dominated actions to remove before solving (default: none). Strict elimination '
+                            'keeps every equilibrium but rarely pays off on small games')
+    parser.add_argument('--cache-size',
+                       type=int,
+                       default=0,
+                       help='Solved games each worker remembers, so repeats (even with actions reordered or '
+                            'payoffs rescaled) are not solved again (default: 0, no cache)')
+    parser.add_argument('--cache-dir',
+                       default=None,
+                       help='Directory of a disk cache of solved games, kept between runs. Every newly '
+                            'solved game is written as its own file, which can make runs with few repeats '
+                            'several times slower')
+    parser.add_argument('--generate',
+                       type=int,
+                       default=None,
+                       metavar='COUNT',
+                       help='Instead of solving, write COUNT random games to the input file')
+    parser.add_argument('--actions',
+                       type=int,
+                       default=3,
+                       help='With --generate, actions per player (default: 3)')
+    parser.add_argument('-s', '--seed',
+                       type=int,
+                       default=None,
+                       help='With --generate, the random seed')
+    parser.add_argument('-v', '--verbose',
+                       action='store_true',
+                       help='Report progress on stderr while running')
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("Number of workers must be positive")
+    if args.batch_size < 1:
+        parser.error("Batch size must be positive")
+    if args.cache_size < 0:
+        parser.error("Cache size can't be negative")
+    if args.generate is not None and (args.generate < 0 or args.actions < 1):
+        parser.error("--generate needs a non-negative count and at least one action")
+    return args
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    if args.generate is not None:
+        with open(args.input, 'wb') as sink:
+            generate_games(sink, args.generate, args.actions, args.seed)
+        sys.exit(0)
+
+    source = sys.stdin.buffer if args.input == '-' else open(args.input, 'rb')
+    sink = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    start_time = time.perf_counter()
+    try:
+        count, hits = analyze_stream(source, sink, args.workers, args.batch_size, not args.unordered, args.eliminate,
+                                     verbose=args.verbose, cache_size=args.cache_size, cache_dir=args.cache_dir)
+    finally:
+        if source is not sys.stdin.buffer:
+            source.close()
+        if sink is not sys.stdout.buffer:
+            sink.close()
+    elapsed = time.perf_counter() - start_time
+    print(f"Solved {count:,} games in {elapsed:.2f}s ({count / elapsed if elapsed else 0:,.0f} games/sec)", file=sys.stderr)
+    if args.cache_size or args.cache_dir:
+        print(f"Cache hits: {hits:,} ({hits / count if count else 0:.1%})", file=sys.stderr)
@@ -4,10 +4,18 @@ Game theory solver program, focusing on finding Nash equilibria and optimal stra
 """
 import sys
 import argparse
-from typing import List, Tuple, Dict, Set, Optional
+import itertools
+from operator import itemgetter
+from typing import List, Tuple, Dict, Set, Optional, Sequence
 from dataclasses import dataclass
+import numpy as np
 from google.protobuf import message
-from game_theory_pb2 import Action as ActionProto, Player as PlayerProto, Game as GameProto, PayoffPair
+from dominance import iterated_elimination
+from equilibrium_cache import EquilibriumCache, canonicalize
+from learning import LearningResult, learn_equilibrium
+from mixed_nash import count_supports, lemke_howson_restarts, support_enumeration, unique_equilibria
+from zero_sum import approximate_zero_sum, constant_sum, solve_zero_sum
+from game_theory_pb2 import Action as ActionProto, Player as PlayerProto, Game as GameProto, PackedPayoffs
 
 @dataclass
 class Action:
@@ -63,90 +71,364 @@ class Player:
 class Game:
     """
     Represents a game theory scenario with defined payoffs and players.
+
+    Games may have any number of players. Payoffs are kept as dense arrays,
+    one per player over the joint action space, indexed by the positions of
+    the actions in each player's action list; payoffs[0][i, j] is player 1's
+    payoff when player 1 plays their action i and player 2 their action j.
+    Games built from a payoff_matrix dict get their arrays on first use, and
+    games built with from_arrays only build the dict if it is asked for.
+    Assign a new payoff_matrix (rather than editing it in place) to change
+    the payoffs.
     """
-    def __init__(self, players: List[Player], payoff_matrix: Dict[Tuple[str, str], Tuple[float, float]]):
+    def __init__(self, players: List[Player], payoff_matrix: Dict[Tuple[str, ...], Tuple[float, ...]]):
         self.players = players
         self.payoff_matrix = payoff_matrix
-        self.nash_equilibria: List[Tuple[str, str]] = []
+        self.nash_equilibria: List[Tuple[str, ...]] = []
+
+    @classmethod
+    def from_arrays(cls, players: List[Player], payoffs: Sequence[np.ndarray]) -> 'Game':
+        """
+        Create a Game directly from payoff arrays, without building the payoff_matrix dict.
+
+        @param players: The players, whose action lists give the array axes
+        @param payoffs: One array per player, of shape (len(player 1's actions), len(player 2's actions), ...);
+                        numeric dtypes are kept, so e.g. float32 halves the memory of large games
+        @return: Game instance
+        """
+        payoffs = [np.asarray(payoff) for payoff in payoffs]
+        payoffs = [payoff if np.issubdtype(payoff.dtype, np.number) else payoff.astype(float) for payoff in payoffs]
+        shape = tuple(len(player.actions) for player in players)
+        if len(payoffs) != len(players) or any(payoff.shape != shape for payoff in payoffs):
+            raise ValueError(f"Expected {len(players)} payoff arrays of shape {shape}")
+        game = cls(players, None)
+        game._payoffs = payoffs
+        return game
+
+    @property
+    def payoff_matrix(self) -> Dict[Tuple[str, ...], Tuple[float, ...]]:
+        """Payoffs keyed by (player1_action, player2_action, ...)."""
+        if self._payoff_matrix is None:
+            # Profiles in row-major order, matching the flattened arrays
+            cells = np.stack([payoff.ravel() for payoff in self._payoffs], axis=1).tolist()
+            self._payoff_matrix = dict(zip(itertools.product(*self.action_names()), map(tuple, cells)))
+        return self._payoff_matrix
+
+    @payoff_matrix.setter
+    def payoff_matrix(self, payoff_matrix: Dict[Tuple[str, ...], Tuple[float, ...]]) -> None:
+        self._payoff_matrix = payoff_matrix
+        self._payoffs = None
+
+    def action_names(self) -> List[List[str]]:
+        """Names of each player's actions, in array order."""
+        return [[action.name for action in player.actions] for player in self.players]
+
+    def action_indices(self) -> List[Dict[str, int]]:
+        """For each player, a map from action name to its position in the arrays."""
+        return [{name: i for i, name in enumerate(names)} for names in self.action_names()]
+
+    @property
+    def payoffs(self) -> List[np.ndarray]:
+        """One dense payoff array per player, indexed by action positions."""
+        if self._payoffs is None:
+            indices = self.action_indices()
+            num_players = len(indices)
+            profiles, values = list(self._payoff_matrix), list(self._payoff_matrix.values())
+            if (set(map(len, profiles)) | set(map(len, values))) - {num_players}:
+                for profile, payoff in zip(profiles, values):
+                    if len(profile) != num_players or len(payoff) != num_players:
+                        raise ValueError(f"Payoff matrix entry {profile} does not match the {num_players} players")
+            # Translate every profile to array positions, one player at a time,
+            # and fill all the cells with a single assignment
+            positions = []
+            for k, index in enumerate(indices):
+                try:
+                    positions.append(np.fromiter(map(index.__getitem__, map(itemgetter(k), profiles)),
+                                                 dtype=np.intp, count=len(profiles)))
+                except KeyError as e:
+                    raise ValueError(f"Payoff matrix names {e.args[0]!r}, which is not an action of player {k + 1}")
+            values = np.fromiter(itertools.chain.from_iterable(values), dtype=float,
+                                 count=len(values) * num_players).reshape(len(values), num_players)
+            payoffs = np.full((num_players,) + tuple(len(index) for index in indices), np.nan)
+            payoffs[(slice(None),) + tuple(positions)] = values.T
+            if np.isnan(payoffs).any():
+                missing = np.argwhere(np.isnan(payoffs[0]))[0]
+                names = ', '.join(player.actions[i].name for player, i in zip(self.players, missing))
+                raise ValueError(f"Payoff matrix has no entry for ({names})")
+            self._payoffs = list(payoffs)
+        return self._payoffs
+
+    def player_index(self, player: Player) -> int:
+        """Position of a player in the game, matched by identity before equality."""
+        for i, candidate in enumerate(self.players):
+            if candidate is player:
+                return i
+        return self.players.index(player)
+
+    def best_response_masks(self) -> List[np.ndarray]:
+        """
+        For each player, a boolean array over all action profiles that is true
+        where that player's action is a best response to the others'.
+
+        @return: One mask per player, each of the payoff arrays' shape
+        """
+        # One max pass per player, along that player's own axis
+        return [payoff == payoff.max(axis=i, keepdims=True) for i, payoff in enumerate(self.payoffs)]
     
-    def to_proto(self) -> GameProto:
-        """Convert this Game to a protobuf message."""
+    def to_proto(self, packed: bool = True) -> GameProto:
+        """
+        Convert this Game to a protobuf message.
+
+        @param packed: Store the payoffs as packed arrays; otherwise use the
+                       older map fields, for readers that predate them
+        """
         proto = GameProto()
         proto.players.extend(player.to_proto() for player in self.players)
-        
-        # Convert payoff matrix to map format
-        for (action1, action2), (payoff1, payoff2) in self.payoff_matrix.items():
-            key = f"{action1},{action2}"
-            payoff = PayoffPair()
-            payoff.player1_payoff = payoff1
-            payoff.player2_payoff = payoff2
-            proto.payoff_matrix[key] = payoff
+
+        if packed:
+            proto.packed_payoffs.version = PACKED_PAYOFFS_VERSION
+            for names in self.action_names():
+                proto.packed_payoffs.actions.add().names.extend(names)
+            proto.packed_payoffs.payoffs.extend(np.ascontiguousarray(payoff, dtype=PACKED_DTYPE).tobytes()
+                                                for payoff in self.payoffs)
+        else:
+            # Convert payoff matrix to map format; pairs for two players, vectors otherwise
+            for profile, payoffs in self.payoff_matrix.items():
+                key = ','.join(profile)
+                if len(self.players) == 2:
+                    # Message-valued map entries can't be assigned, only filled in
+                    payoff = proto.payoff_matrix[key]
+                    payoff.player1_payoff = payoffs[0]
+                    payoff.player2_payoff = payoffs[1]
+                else:
+                    proto.payoff_vectors[key].payoffs.extend(payoffs)
         
         # Convert Nash equilibria to string format
-        proto.nash_equilibria.extend(f"{eq[0]}/{eq[1]}" for eq in self.nash_equilibria)
+        proto.nash_equilibria.extend('/'.join(eq) for eq in self.nash_equilibria)
         
         return proto
     
     @classmethod
     def from_proto(cls, proto: GameProto) -> 'Game':
-        """Create a Game from a protobuf message."""
+        """Create a Game from a protobuf message, in either payoff encoding."""
         players = [Player.from_proto(player) for player in proto.players]
         
-        # Convert payoff matrix from map format
-        payoff_matrix = {}
-        for key, payoff in proto.payoff_matrix.items():
-            action1, action2 = key.split(',')
-            payoff_matrix[(action1, action2)] = (payoff.player1_payoff, payoff.player2_payoff)
-        
-        # Create game instance
-        game = cls(players=players, payoff_matrix=payoff_matrix)
+        if proto.HasField('packed_payoffs'):
+            game = cls.from_arrays(players, unpack_payoffs(proto.packed_payoffs, players))
+        else:
+            # Convert payoff matrix from map format
+            payoff_matrix = {}
+            for key, payoff in proto.payoff_matrix.items():
+                action1, action2 = key.split(',')
+                payoff_matrix[(action1, action2)] = (payoff.player1_payoff, payoff.player2_payoff)
+            for key, payoff in proto.payoff_vectors.items():
+                payoff_matrix[tuple(key.split(','))] = tuple(payoff.payoffs)
+            game = cls(players=players, payoff_matrix=payoff_matrix)
         
         # Convert Nash equilibria from string format
         game.nash_equilibria = [tuple(eq.split('/')) for eq in proto.nash_equilibria]
         
         return game
     
-    def find_best_response(self, player: Player, other_player_action: str) -> Set[str]:
+    def find_best_response(self, player: Player, other_player_action) -> Set[str]:
         """
-        Find the best response(s) for a player given the other player's action.
+        Find the best response(s) for a player given the other players' actions.
         
         @param player: The player finding their best response
-        @param other_player_action: The action chosen by the other player
+        @param other_player_action: The action chosen by the other player, or with more than
+                                    two players, the other players' actions in player order
         @return: Set of action names that are best responses
         """
-        best_payoff = float('-inf')
-        best_actions = set()
-        for action in player.actions:
-            if player == self.players[0]:
-                payoff = self.payoff_matrix[(action.name, other_player_action)][0]
-            else:
-                payoff = self.payoff_matrix[(other_player_action, action.name)][1]
-            if payoff > best_payoff:
-                best_payoff = payoff
-                best_actions = {action.name}
-            elif payoff == best_payoff:
-                best_actions.add(action.name)
-        return best_actions
-    
-    def find_nash_equilibria(self) -> List[Tuple[str, str]]:
+        index = self.player_index(player)
+        others = [other_player_action] if isinstance(other_player_action, str) else list(other_player_action)
+        if len(others) != len(self.players) - 1:
+            raise ValueError(f"Expected actions for the {len(self.players) - 1} other players")
+        indices = self.action_indices()
+        position = [indices[i][name] for i, name in zip((i for i in range(len(self.players)) if i != index), others)]
+        position.insert(index, slice(None))
+        payoffs = self.payoffs[index][tuple(position)]
+        return {player.actions[i].name for i in np.flatnonzero(payoffs == payoffs.max())}
+    
+    def find_nash_equilibria(self, cache: Optional[EquilibriumCache] = None) -> List[Tuple[str, ...]]:
         """
         Find all Nash equilibria in the game.
         
-        @return: List of (player1_action, player2_action) tuples representing Nash equilibria
+        @param cache: Look the game up here first, and store the result on a miss; games
+                      that differ only in action order or payoff scale share an entry
+        @return: List of (player1_action, player2_action, ...) tuples representing Nash equilibria
         """
-        equilibria = []
-        # Check each possible action combination
-        for action1 in self.players[0].actions:
-            for action2 in self.players[1].actions:
-                # Find best responses for both players
-                player1_best = self.find_best_response(self.players[0], action2.name)
-                player2_best = self.find_best_response(self.players[1], action1.name)
-                # If both players are playing their best responses, it's a Nash equilibrium
-                if action1.name in player1_best and action2.name in player2_best:
-                    equilibria.append((action1.name, action2.name))
+        if cache is not None:
+            canonical = canonicalize(self.payoffs)
+            equilibria = cache.get(canonical, self.action_names())
+            if equilibria is None:
+                equilibria = self.find_nash_equilibria()
+                cache.put(canonical, self.action_names(), equilibria)
+            self.nash_equilibria = equilibria
+            return equilibria
+
+        # A profile is an equilibrium where every player is best responding.
+        # The masks are combined one player at a time, so only two are ever held.
+        payoffs = self.payoffs
+        equilibrium = np.ones(payoffs[0].shape, dtype=bool)
+        for i, payoff in enumerate(payoffs):
+            equilibrium &= payoff == payoff.max(axis=i, keepdims=True)
+        names = self.action_names()
+        equilibria = [tuple(names[i][k] for i, k in enumerate(profile)) for profile in np.argwhere(equilibrium)]
         self.nash_equilibria = equilibria
         return equilibria
 
+    def eliminate_dominated(self, weak: bool = False, mixed: bool = False) -> 'Game':
+        """
+        Iteratively remove dominated actions (see dominance.py).
+        
+        The reduced game keeps the players' names and the surviving Action
+        objects, so anything found in it is already in terms of the original
+        action names. Strict and mixed elimination keep every Nash
+        equilibrium; weak elimination may lose some.
+        
+        @param weak: Also remove weakly dominated actions
+        @param mixed: Also remove actions strictly dominated by a mixture of other actions
+        @return: The reduced Game
+        """
+        surviving = iterated_elimination(self.payoffs, weak, mixed)
+        players = [Player(player.name, [player.actions[i] for i in keep], player.current_action)
+                   for player, keep in zip(self.players, surviving)]
+        return Game.from_arrays(players, [payoff[np.ix_(*surviving)] for payoff in self.payoffs])
+
+    def constant_sum(self) -> Optional[float]:
+        """
+        The constant the players' payoffs always add up to (0 for zero-sum
+        games), or None if the game isn't constant-sum.
+        """
+        if len(self.players) != 2:
+            return None
+        return constant_sum(*self.payoffs)
+
+    def solve_zero_sum(self, approximate: bool = False, tol: float = 1e-3) -> Tuple[float, Dict[str, float], Dict[str, float], float]:
+        """
+        Solve a two-player constant-sum game for its value and optimal strategies.
+
+        Works on the dense payoff arrays; for large sparse games, call
+        zero_sum.solve_zero_sum on a scipy.sparse matrix directly.
+        
+        @param approximate: Use the iterative solver instead of the exact linear program
+        @param tol: With approximate, the largest accepted error bound
+        @return: (player 1's value, player 1's strategy, player 2's strategy, error bound); player 2's
+                 value is the constant sum minus player 1's, and strategies map action names to probabilities
+        """
+        if self.constant_sum() is None:
+            raise ValueError("Not a two-player constant-sum game")
+        first = self.payoffs[0]
+        solution = approximate_zero_sum(first, tol) if approximate else solve_zero_sum(first)
+        names = self.action_names()
+        strategies = [{names[i][k]: strategy[k].item() for k in np.flatnonzero(strategy > 1e-12)}
+                      for i, strategy in enumerate((solution.row_strategy, solution.column_strategy))]
+        # Adding 0.0 turns a -0.0 value into 0.0
+        return float(solution.value) + 0.0, strategies[0], strategies[1], solution.error_bound
+
+    def learn_equilibrium(self, method: str = 'regret-matching', tol: float = 1e-3,
+                          warm_start: Optional[LearningResult] = None, **options) -> LearningResult:
+        """
+        Approximate a mixed equilibrium of a two-player game by learning dynamics.
+
+        Works on the payoff arrays alone, so games built with from_arrays with
+        10^4 or more actions per player are fine.
+
+        @param method: One of LEARNING_METHODS
+        @param tol: Stop once exploitability is at most this
+        @param warm_start: Result of an earlier run, e.g. before the payoffs changed slightly
+        @return: LearningResult, whose strategies follow the order of each player's actions
+        """
+        if len(self.players) != 2:
+            raise ValueError("Learning dynamics are for two-player games")
+        return learn_equilibrium(*self.payoffs, method=method, tol=tol, warm_start=warm_start, **options)
+
+    def find_mixed_equilibria(self, method: str = 'auto') -> List[Tuple[Dict[str, float], Dict[str, float]]]:
+        """
+        Find mixed-strategy Nash equilibria of a two-player game.
+        
+        @param method: 'support' enumerates every pair of supports and finds all equilibria of
+                       nondegenerate games; 'lemke-howson' finds one equilibrium by path following
+                       and scales to hundreds of actions; 'lp' solves constant-sum games as a
+                       linear program; 'auto' picks by game size and type
+        @return: List of (player1_strategy, player2_strategy), each mapping action names to
+                 their probabilities, for the actions played with positive probability
+        """
+        if len(self.players) != 2:
+            raise ValueError("Mixed equilibria are only supported for two-player games")
+        if method not in MIXED_METHODS:
+            raise ValueError(f"Unknown mixed equilibrium method: {method}")
+        first, second = self.payoffs
+        if method == 'auto':
+            if count_supports(*first.shape) <= SUPPORT_ENUMERATION_LIMIT:
+                method = 'support'
+            else:
+                method = 'lp' if self.constant_sum() is not None else 'lemke-howson'
+        if method == 'support':
+            equilibria = unique_equilibria(support_enumeration(first, second))
+        elif method == 'lp':
+            if self.constant_sum() is None:
+                raise ValueError("The 'lp' method needs a constant-sum game")
+            solution = solve_zero_sum(first)
+            equilibria = [(solution.row_strategy, solution.column_strategy)]
+        else:
+            equilibria = [lemke_howson_restarts(first, second)]
+        
+        names = self.action_names()
+        return [tuple({names[i][k]: strategy[k].item() for k in np.flatnonzero(strategy > 1e-12)}
+                      for i, strategy in enumerate(equilibrium))
+                for equilibrium in equilibria]
+
+# Largest number of support pairs the 'auto' mixed solver enumerates before
+# switching to Lemke-Howson
+SUPPORT_ENUMERATION_LIMIT = 20000
+
+MIXED_METHODS = ('auto', 'support', 'lemke-howson', 'lp')
+
+ELIMINATION_MODES = ('none', 'strict', 'weak', 'mixed')
+
+# Version of the PackedPayoffs encoding written by Game.to_proto
+PACKED_PAYOFFS_VERSION = 1
+
+# Little-endian doubles, the layout of a packed repeated double
+PACKED_DTYPE = np.dtype('<f8')
+
+def unpack_payoffs(packed: PackedPayoffs, players: List[Player]) -> List[np.ndarray]:
+    """
+    Read the payoff arrays of a PackedPayoffs message.
+
+    Each block becomes an array over its bytes, without decoding values one
+    by one. Blocks are reordered to the players' action lists only if their
+    action tables list the actions in another order.
+
+    @param packed: The message
+    @param players: The game's players
+    @return: One payoff array per player, read-only unless reordered
+    """
+    if packed.version != PACKED_PAYOFFS_VERSION:
+        raise ValueError(f"Unsupported packed payoff version {packed.version}")
+    if len(packed.actions) != len(players) or len(packed.payoffs) != len(players):
+        raise ValueError(f"Packed payoffs need an action table and a block for each of the {len(players)} players")
+    tables = [list(table.names) for table in packed.actions]
+    shape = tuple(len(names) for names in tables)
+
+    payoffs = []
+    for block in packed.payoffs:
+        if len(block) != PACKED_DTYPE.itemsize * int(np.prod(shape)):
+            raise ValueError(f"Packed payoff block has {len(block)} bytes, expected shape {shape}")
+        payoffs.append(np.frombuffer(block, dtype=PACKED_DTYPE).reshape(shape))
+
+    for axis, (player, names) in enumerate(zip(players, tables)):
+        expected = [action.name for action in player.actions]
+        if names == expected:
+            continue
+        if sorted(names) != sorted(expected):
+            raise ValueError(f"Packed payoff actions for {player.name} don't match the player's actions")
+        positions = {name: i for i, name in enumerate(names)}
+        order = [positions[name] for name in expected]
+        payoffs = [np.take(payoff, order, axis=axis) for payoff in payoffs]
+    return payoffs
+
 def create_prisoners_dilemma() -> Tuple[Game, Dict[str, Action]]:
     """
     Create a Prisoner's Dilemma game with standard payoffs.
@@ -379,24 +661,81 @@ def create_ultimatum_game() -> Tuple[Game, Dict[str, Action]]:
     
     return Game([proposer, responder], payoff_matrix), actions
 
-def analyze_game(game: Game, actions: Dict[str, Action], verbose: bool = False) -> None:
+def create_volunteers_dilemma(num_players: int = 4) -> Tuple[Game, Dict[str, Action]]:
+    """
+    Create a Volunteer's Dilemma for any number of players.
+    
+    In this game:
+    - Each player can volunteer (at a cost of 1) or ignore
+    - If at least one player volunteers, everyone gets a benefit of 3
+    - If nobody volunteers, everyone gets 0
+    
+    Every pure Nash equilibrium has exactly one volunteer.
+    
+    @param num_players: Number of players
+    @return: Tuple of (Game instance, Dictionary mapping action names to Action objects)
+    """
+    # Define actions
+    volunteer = Action("volunteer")
+    ignore = Action("ignore")
+    
+    # Create players
+    players = [Player(f"Player {i + 1}", [volunteer, ignore]) for i in range(num_players)]
+    
+    # Index 0 is volunteer and 1 is ignore on every axis
+    volunteers = np.indices((2,) * num_players) == 0
+    benefit = np.where(volunteers.any(axis=0), 3, 0)
+    payoffs = [benefit - volunteers[i] for i in range(num_players)]
+    
+    # Create actions dictionary
+    actions = {
+        "volunteer": volunteer,
+        "ignore": ignore
+    }
+    
+    return Game.from_arrays(players, payoffs), actions
+
+def display_name(player: Player, position: int) -> str:
+    """Name to show for a player; anonymous players are named by their position."""
+    name = player.name
+    if name.startswith("Player_") and name[len("Player_"):].isdigit():
+        return f"Player {position + 1}"
+    return name
+
+def analyze_game(game: Game, actions: Dict[str, Action], verbose: bool = False, mixed_method: str = 'auto',
+                 approximate: float = None, eliminate: str = 'strict') -> None:
     """
     Analyze the game to find Nash equilibria and optimal strategies.
     
     @param game: The game to analyze
     @param actions: Dictionary mapping action names to Action objects
     @param verbose: Whether to print detailed information
+    @param mixed_method: How to find mixed equilibria of two-player games (see Game.find_mixed_equilibria)
+    @param approximate: Solve constant-sum games iteratively to within this error instead of exactly
+    @param eliminate: Dominated actions to remove before solving: none, strict, weak or mixed
     """
+    full_game = game
+    if eliminate != 'none':
+        game = game.eliminate_dominated(weak=eliminate == 'weak', mixed=eliminate == 'mixed')
     equilibria = game.find_nash_equilibria()
+    full_game.nash_equilibria = equilibria
     
     print("\nGame Analysis:")
     print("=============")
     
-    if verbose:
+    removed = [(display_name(player, i), [action.name for action in player.actions if action not in reduced.actions])
+               for i, (player, reduced) in enumerate(zip(full_game.players, game.players))]
+    if any(names for _, names in removed):
+        print(f"\nDominated actions removed ({eliminate}):")
+        for name, names in removed:
+            if names:
+                print(f"- {name}: {', '.join(names)}")
+    
+    if verbose and len(game.players) == 2:
         print("\nPayoff Matrix:")
         # Get unique actions for each player
-        player1_actions = sorted(set(action1 for action1, _ in game.payoff_matrix.keys()))
-        player2_actions = sorted(set(action2 for _, action2 in game.payoff_matrix.keys()))
+        player1_actions = sorted(set(action1 for action1, _ in full_game.payoff_matrix.keys()))
+        player2_actions = sorted(set(action2 for _, action2 in full_game.payoff_matrix.keys()))
         
         # Calculate column widths
         action_width = max(len(action) for action in player1_actions + player2_actions)
@@ -414,7 +753,7 @@ def analyze_game(game: Game, actions: Dict[str, Action], verbose: bool = False)
         for action1 in player1_actions:
             print(f"{action1:<{action_width}}", end="")
             for action2 in player2_actions:
-                payoff = game.payoff_matrix[(action1, action2)]
+                payoff = full_game.payoff_matrix[(action1, action2)]
                 print(f"  ({payoff[0]:>2}, {payoff[1]:>2})", end="")
             print()
         print()
@@ -422,13 +761,33 @@ def analyze_game(game: Game, actions: Dict[str, Action], verbose: bool = False)
     print("\nNash Equilibria:")
     if equilibria:
         for eq in equilibria:
-            print(f"- {eq[0]}/{eq[1]}")
+            print(f"- {'/'.join(eq)}")
             if verbose:
-                payoff = game.payoff_matrix[eq]
-                print(f"  Payoffs: ({payoff[0]}, {payoff[1]})")
+                payoff = full_game.payoff_matrix[eq]
+                print(f"  Payoffs: ({', '.join(str(p) for p in payoff)})")
     else:
         print("No pure Nash equilibria found")
     
+    if len(game.players) == 2:
+        # Pure equilibria are listed above; only show the properly mixed ones
+        mixed = [eq for eq in game.find_mixed_equilibria(mixed_method) if max(len(eq[0]), len(eq[1])) > 1]
+        if mixed:
+            print("\nMixed Nash Equilibria:")
+            for strategy1, strategy2 in mixed:
+                print("- " + "; ".join(
+                    f"{display_name(player, i)}: " + ", ".join(f"{name} {p:.1%}" for name, p in strategy.items())
+                    for i, (player, strategy) in enumerate(zip(game.players, (strategy1, strategy2)))))
+    
+    # Checked on the full game: a reduced game with one action each is trivially constant-sum
+    total = full_game.constant_sum()
+    if total is not None:
+        value, strategy1, strategy2, error = game.solve_zero_sum(approximate is not None, approximate or 0)
+        print(f"\nThis is a {'zero' if total == 0 else 'constant'}-sum game (payoffs add up to {total:g})")
+        print(f"Value: {display_name(game.players[0], 0)} {value:.4g}, {display_name(game.players[1], 1)} {total - value:.4g}"
+              + (f" (within {error:.2g})" if approximate is not None else ""))
+        for i, (player, strategy) in enumerate(zip(game.players, (strategy1, strategy2))):
+            print(f"- {display_name(player, i)} optimal strategy: " + ", ".join(f"{name} {p:.1%}" for name, p in strategy.items()))
+    
     # Identify the game type based on available actions
     game_type = None
     if "defect" in actions and "cooperate" in actions:
@@ -443,6 +802,8 @@ def analyze_game(game: Game, actions: Dict[str, Action], verbose: bool = False)
         game_type = "matching_pennies"
     elif "90-10" in actions and "accept" in actions:
         game_type = "ultimatum"
+    elif "volunteer" in actions and "ignore" in actions:
+        game_type = "volunteers_dilemma"
     
     # Print game-specific analysis
     if game_type == "prisoners_dilemma" and len(equilibria) == 1 and equilibria[0] == (actions["defect"].name, actions["defect"].name):
@@ -476,6 +837,11 @@ def analyze_game(game: Game, actions: Dict[str, Action], verbose: bool = False)
         print("The proposer offers the minimum amount (90-10 split)")
         print("The responder accepts any positive amount")
         print("This demonstrates the tension between rational and fair behavior")
+    elif game_type == "volunteers_dilemma" and equilibria and all(eq.count("volunteer") == 1 for eq in equilibria):
+        print("\nThis is the Volunteer's Dilemma outcome:")
+        print(f"There are {len(equilibria)} Nash equilibria, each with exactly one volunteer")
+        print("Everyone prefers that someone else pays the cost of volunteering")
+        print("Without coordination, nobody may volunteer at all, leaving everyone with nothing")
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -485,6 +851,20 @@ def parse_args():
     parser.add_argument('-v', '--verbose',
                        action='store_true',
                        help='Print detailed information about the game analysis')
+    parser.add_argument('--mixed',
+                       choices=MIXED_METHODS,
+                       default='auto',
+                       help='How to find mixed equilibria: support enumeration, Lemke-Howson, a linear program '
+                            'for constant-sum games, or auto by game size (default: auto)')
+    parser.add_argument('--eliminate',
+                       choices=ELIMINATION_MODES,
+                       default='strict',
+                       help='Dominated actions to remove before solving; weak elimination can lose equilibria (default: strict)')
+    parser.add_argument('--approximate',
+                       type=float,
+                       default=None,
+                       metavar='EPSILON',
+                       help='Solve constant-sum games iteratively to within this error instead of as an exact LP')
     args = parser.parse_args()
     return args
 
@@ -494,24 +874,28 @@ if __name__ == '__main__':
     # Create and analyze all games
     print("\nAnalyzing Prisoner's Dilemma:")
     game, actions = create_prisoners_dilemma()
-    analyze_game(game, actions, args.verbose)
+    analyze_game(game, actions, args.verbose, args.mixed, args.approximate, args.eliminate)
     
     print("\nAnalyzing Battle of the Sexes:")
     game, actions = create_battle_of_sexes()
-    analyze_game(game, actions, args.verbose)
+    analyze_game(game, actions, args.verbose, args.mixed, args.approximate, args.eliminate)
     
     print("\nAnalyzing Chicken:")
     game, actions = create_chicken()
-    analyze_game(game, actions, args.verbose)
+    analyze_game(game, actions, args.verbose, args.mixed, args.approximate, args.eliminate)
     
     print("\nAnalyzing Stag Hunt:")
     game, actions = create_stag_hunt()
-    analyze_game(game, actions, args.verbose)
+    analyze_game(game, actions, args.verbose, args.mixed, args.approximate, args.eliminate)
     
     print("\nAnalyzing Matching Pennies:")
     game, actions = create_matching_pennies()
-    analyze_game(game, actions, args.verbose)
+    analyze_game(game, actions, args.verbose, args.mixed, args.approximate, args.eliminate)
     
     print("\nAnalyzing Ultimatum Game:")
     game, actions = create_ultimatum_game()
-    analyze_game(game, actions, args.verbose) 
\ No newline at end of file
+    analyze_game(game, actions, args.verbose, args.mixed, args.approximate, args.eliminate)
+    
+    print("\nAnalyzing Volunteer's Dilemma (4 players):")
+    game, actions = create_volunteers_dilemma(4)
+    analyze_game(game, actions, args.verbose, args.mixed, args.approximate, args.eliminate) 
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+Host behaviour variants for the Monty Hall problem.
+
+Each variant is a strategy object with a batched kernel: given arrays of car
+positions and first picks, it plays out what the host does and counts how
+often switching and staying win. The kernels only draw the random numbers
+each variant needs, so studying a variant costs about as much as the
+classic game. Each variant also knows its exact win probabilities, as
+fractions, for checking the kernels against.
+"""
+from fractions import Fraction
+from typing import Tuple
+
+import numpy as np
+
+# How a variant's kernel reports a batch: (win_switch, win_no_switch, counted),
+# where counted is the number of games that count towards the win rates. It is
+# smaller than the batch when the variant conditions on what the host did, for
+# example games in which an ignorant host happened to reveal the car.
+KernelResult = Tuple[int, int, int]
+
+# Exact (switch, stay) win probabilities, conditional on the counted games
+ExactResult = Tuple[Fraction, Fraction]
+
+def exact_fraction(x: float) -> Fraction:
+    """
+    A probability given as a float, read as the decimal it was written as
+    (0.1 is 1/10, not the nearest binary fraction).
+    """
+    return Fraction(repr(float(x)))
+
+def other_door(your_door: np.ndarray, num_doors: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draw, for every game, a door uniformly from the doors other than your pick.
+    """
+    door = rng.integers(1, num_doors - 1, size=your_door.shape, dtype=your_door.dtype, endpoint=True)
+    return door + (door >= your_door)
+
+def lowest_other_door(your_door: np.ndarray) -> np.ndarray:
+    """
+    The lowest-numbered door other than your pick, for every game.
+    """
+    return np.where(your_door == 1, 2, 1).astype(your_door.dtype)
+
+class HostVariant:
+    """
+    Base class for host behaviours.
+    """
+    name = None
+
+    def describe(self) -> str:
+        """Short human-readable description, printed when the variant runs."""
+        return self.name
+
+    def kernel(self, the_car: np.ndarray, your_door: np.ndarray, num_doors: int, rng: np.random.Generator) -> KernelResult:
+        """
+        Play a batch of games.
+
+        @param the_car: Door hiding the car, one per game
+        @param your_door: Your first pick, one per game
+        @param num_doors: Number of doors in every game
+        @param rng: Generator for any extra draws the host needs
+        @return: (win_switch, win_no_switch, counted)
+        """
+        raise NotImplementedError
+
+    def exact(self, num_doors: int) -> ExactResult:
+        """
+        Exact probabilities that switching and staying win.
+
+        @return: (switch, stay) as fractions
+        """
+        raise NotImplementedError
+
+class ClassicHost(HostVariant):
+    """
+    The host knows where the car is and opens every other door but one,
+    never revealing the car.
+    """
+    name = 'classic'
+
+    def kernel(self, the_car, your_door, num_doors, rng):
+        win_no_switch = int(np.count_nonzero(the_car == your_door))
+        return the_car.size - win_no_switch, win_no_switch, the_car.size
+
+    def exact(self, num_doors):
+        return Fraction(num_doors - 1, num_doors), Fraction(1, num_doors)
+
+class IgnorantHost(HostVariant):
+    """
+    "Monty Fall": the host doesn't know where the car is and opens every other
+    door but one at random. Games where he reveals the car are discarded, so
+    the win rates are conditional on him having revealed only goats.
+    """
+    name = 'fall'
+
+    def kernel(self, the_car, your_door, num_doors, rng):
+        kept = other_door(your_door, num_doors, rng)
+        picked_car = the_car == your_door
+        win_switch = int(np.count_nonzero(kept == the_car))
+        win_no_switch = int(np.count_nonzero(picked_car))
+        # The car stayed hidden if you picked it or he happened to keep it closed
+        return win_switch, win_no_switch, win_switch + win_no_switch
+
+    def exact(self, num_doors):
+        # Picking the car and the host keeping it closed are equally likely (1/n each)
+        return Fraction(1, 2), Fraction(1, 2)
+
+class OpenKHost(HostVariant):
+    """
+    The host knowingly opens only k goat doors. A switcher then picks
+    uniformly among the other doors that are still closed.
+    """
+    name = 'open-k'
+
+    def __init__(self, k: int = 1):
+        if k < 1:
+            raise ValueError("The host must open at least one door")
+        self.k = k
+
+    def describe(self) -> str:
+        return f"{self.name} (host opens {self.k} door{'s' if self.k != 1 else ''})"
+
+    def check(self, num_doors: int) -> None:
+        if self.k > num_doors - 2:
+            raise ValueError(f"The host can open at most {num_doors - 2} doors with {num_doors} doors")
+
+    def kernel(self, the_car, your_door, num_doors, rng):
+        self.check(num_doors)
+        missed = the_car != your_door
+        # If you missed the car it is one of the closed doors left to switch
+        # to, and which of them the switcher takes is uniform.
+        remaining = num_doors - 1 - self.k
+        switch_hits = rng.integers(0, remaining, size=the_car.shape) == 0
+        win_switch = int(np.count_nonzero(missed & switch_hits))
+        return win_switch, the_car.size - int(np.count_nonzero(missed)), the_car.size
+
+    def exact(self, num_doors):
+        self.check(num_doors)
+        return Fraction(num_doors - 1, num_doors * (num_doors - 1 - self.k)), Fraction(1, num_doors)
+
+class BiasedHost(HostVariant):
+    """
+    The host knows where the car is and keeps one other door closed. When you
+    picked the car he may keep any goat door closed, and keeps his preferred
+    one (the lowest-numbered door other than yours) with probability bias,
+    choosing uniformly otherwise.
+
+    Averaged over all games the bias changes nothing, so the win rates can be
+    conditioned on what you observe: observe='preferred' counts only games
+    where he kept his preferred door closed, observe='other' only the rest.
+    """
+    name = 'biased'
+    OBSERVATIONS = ('any', 'preferred', 'other')
+
+    def __init__(self, bias: float = 1.0, observe: str = 'any'):
+        if not 0 <= bias <= 1:
+            raise ValueError("Host bias must be between 0 and 1")
+        if observe not in self.OBSERVATIONS:
+            raise ValueError(f"observe must be one of {', '.join(self.OBSERVATIONS)}")
+        self.bias = bias
+        self.observe = observe
+
+    def describe(self) -> str:
+        return f"{self.name} (bias {self.bias:g}, observing {self.observe} door kept closed)"
+
+    def kernel(self, the_car, your_door, num_doors, rng):
+        picked_car = the_car == your_door
+        preferred = lowest_other_door(your_door)
+        free_choice = np.where(rng.random(the_car.shape) < self.bias, preferred, other_door(your_door, num_doors, rng))
+        kept = np.where(picked_car, free_choice, the_car)
+
+        if self.observe == 'preferred':
+            counted = kept == preferred
+        elif self.observe == 'other':
+            counted = kept != preferred
+        else:
+            counted = np.ones(the_car.shape, dtype=bool)
+
+        win_no_switch = int(np.count_nonzero(picked_car & counted))
+        num_counted = int(np.count_nonzero(counted))
+        return num_counted - win_no_switch, win_no_switch, num_counted
+
+    def exact(self, num_doors):
+        bias = exact_fraction(self.bias)
+        n = num_doors
+        # Joint probabilities of (picked the car, missed it) and what is observed
+        if self.observe == 'preferred':
+            # The car is behind the preferred door with probability 1/n
+            stay, switch = Fraction(1, n) * (bias + (1 - bias) / (n - 1)), Fraction(1, n)
+        elif self.observe == 'other':
+            stay, switch = Fraction(1, n) * (1 - bias) * Fraction(n - 2, n - 1), Fraction(n - 2, n)
+        else:
+            stay, switch = Fraction(1, n), Fraction(n - 1, n)
+        return switch / (switch + stay), stay / (switch + stay)
+
+class RefusingHost(HostVariant):
+    """
+    The host knows where the car is but only sometimes offers the switch:
+    with probability offer_if_car when your pick is the car, and
+    offer_if_goat when it is not. A switcher who isn't offered the switch
+    keeps their door.
+    """
+    name = 'refuse'
+
+    def __init__(self, offer_if_car: float = 1.0, offer_if_goat: float = 1.0):
+        if not (0 <= offer_if_car <= 1 and 0 <= offer_if_goat <= 1):
+            raise ValueError("Offer probabilities must be between 0 and 1")
+        self.offer_if_car = offer_if_car
+        self.offer_if_goat = offer_if_goat
+
+    def describe(self) -> str:
+        return f"{self.name} (offers the switch {self.offer_if_car:g} if you picked the car, {self.offer_if_goat:g} otherwise)"
+
+    def kernel(self, the_car, your_door, num_doors, rng):
+        picked_car = the_car == your_door
+        offered = rng.random(the_car.shape) < np.where(picked_car, self.offer_if_car, self.offer_if_goat)
+        # Switching when offered wins exactly when the first pick was wrong
+        win_switch = int(np.count_nonzero(offered != picked_car))
+        return win_switch, int(np.count_nonzero(picked_car)), the_car.size
+
+    def exact(self, num_doors):
+        offer_if_car, offer_if_goat = exact_fraction(self.offer_if_car), exact_fraction(self.offer_if_goat)
+        n = num_doors
+        return Fraction(n - 1, n) * offer_if_goat + Fraction(1, n) * (1 - offer_if_car), Fraction(1, n)
+
+HOST_VARIANTS = {
+    variant.name: variant
+    for variant in (ClassicHost, IgnorantHost, OpenKHost, BiasedHost, RefusingHost)
+}
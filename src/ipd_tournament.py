@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Round-robin tournaments of iterated Prisoner's Dilemma strategies.
+
+Every strategy is a finite automaton: in each state it cooperates with some
+probability, and the moves both players make pick its next state. That
+covers tit-for-tat, grim trigger, Pavlov and friends in a couple of states,
+memory-n strategies in one state per recent history, and stochastic ones
+such as generous tit-for-tat. All strategies are stacked into two padded
+arrays, so one round of every match in a block is a handful of NumPy
+operations over the block however many strategies take part.
+
+Each pair of strategies (including each strategy against itself) plays one
+match. Blocks of matches run across a process pool, and the score matrix
+(average payoff per round of the row strategy against the column strategy)
+is written to a .npy file on disk as blocks finish, so it never has to fit
+in memory. Random draws come from a counter-based stream indexed by round
+and pair, so the scores don't depend on the block size or worker count.
+"""
+import sys
+import time
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from counter_rng import CounterRNG
+from game_theory import Game, create_prisoners_dilemma
+
+# Moves, as positions in each player's action list
+COOPERATE = 0
+DEFECT = 1
+
+# Blocks queued per worker; enough to keep every worker busy
+INFLIGHT_PER_WORKER = 4
+
+# Matches per block sent to a worker
+DEFAULT_BLOCK_PAIRS = 20000
+
+@dataclass
+class Strategy:
+    """
+    A repeated-game strategy as a finite automaton that starts in state 0.
+    """
+    name: str
+    # Probability of cooperating in each state
+    cooperate: np.ndarray
+    # transitions[state, own move, opponent's move] is the next state
+    transitions: np.ndarray
+
+    def __post_init__(self):
+        self.cooperate = np.asarray(self.cooperate, dtype=float)
+        self.transitions = np.asarray(self.transitions, dtype=np.int32)
+        states = self.cooperate.shape[0]
+        if self.transitions.shape != (states, 2, 2):
+            raise ValueError(f"{self.name}: expected transitions of shape ({states}, 2, 2)")
+        if ((self.cooperate < 0) | (self.cooperate > 1)).any():
+            raise ValueError(f"{self.name}: cooperation probabilities must be between 0 and 1")
+        if ((self.transitions < 0) | (self.transitions >= states)).any():
+            raise ValueError(f"{self.name}: transitions must lead to one of the {states} states")
+
+def reactive(name: str, first: float, after_cooperate: float, after_defect: float) -> Strategy:
+    """
+    A strategy that only reacts to the opponent's last move.
+
+    @param first: Probability of cooperating in the first round
+    @param after_cooperate: Probability of cooperating after the opponent cooperated
+    @param after_defect: Probability of cooperating after the opponent defected
+    """
+    # State 0 is the first round, then 1 after cooperation and 2 after defection
+    transitions = np.empty((3, 2, 2), dtype=np.int32)
+    transitions[:, :, COOPERATE] = 1
+    transitions[:, :, DEFECT] = 2
+    return Strategy(name, [first, after_cooperate, after_defect], transitions)
+
+def memory_n(name: str, n: int, responses: Sequence[float], first: Sequence[float]) -> Strategy:
+    """
+    A strategy that reacts to the last n rounds.
+
+    @param n: Rounds remembered
+    @param responses: Probability of cooperating after each history of n rounds. Histories are
+                      numbered in base 4, oldest round first, each round counting as
+                      2 * own move + opponent's move: for n = 1, [after CC, CD, DC, DD]
+    @param first: Probability of cooperating in each of the first n rounds
+    """
+    if len(responses) != 4 ** n or len(first) != n:
+        raise ValueError(f"{name}: a memory-{n} strategy needs {4 ** n} responses and {n} opening moves")
+    # One state per history of k < n rounds, then one per full history
+    offsets = [(4 ** k - 1) // 3 for k in range(n + 2)]
+    cooperate = np.empty(offsets[n + 1])
+    transitions = np.empty((offsets[n + 1], 2, 2), dtype=np.int32)
+    for k in range(n + 1):
+        histories = np.arange(4 ** k)
+        cooperate[offsets[k]:offsets[k + 1]] = first[k] if k < n else responses
+        for own in (COOPERATE, DEFECT):
+            for other in (COOPERATE, DEFECT):
+                extended = histories * 4 + 2 * own + other
+                transitions[offsets[k]:offsets[k + 1], own, other] = (
+                    offsets[k + 1] + extended if k < n else offsets[n] + extended % 4 ** n)
+    return Strategy(name, cooperate, transitions)
+
+def classic_strategies() -> Dict[str, Strategy]:
+    """
+    Well-known strategies, by short name.
+    """
+    grim = Strategy('grim', [1, 0], [[[0, 1], [0, 1]], [[1, 1], [1, 1]]])
+    # Cooperates until the opponent defects twice in a row
+    tit_for_two_tats = Strategy('tf2t', [1, 1, 0], [[[0, 1], [0, 1]], [[0, 2], [0, 2]], [[0, 2], [0, 2]]])
+    return {
+        'allc': reactive('allc', 1, 1, 1),
+        'alld': reactive('alld', 0, 0, 0),
+        'tft': reactive('tft', 1, 1, 0),
+        'stft': reactive('stft', 0, 1, 0),
+        'gtft': reactive('gtft', 1, 1, 1 / 3),
+        'random': reactive('random', 0.5, 0.5, 0.5),
+        'grim': grim,
+        'tf2t': tit_for_two_tats,
+        'pavlov': memory_n('pavlov', 1, [1, 0, 0, 1], [1]),
+    }
+
+def random_memory_strategies(n: int, count: int, seed: int = None) -> List[Strategy]:
+    """
+    Random deterministic memory-n strategies, for large tournaments.
+    """
+    rng = np.random.default_rng(seed)
+    strategies = []
+    for k in range(count):
+        responses = rng.integers(0, 2, 4 ** n)
+        first = rng.integers(0, 2, n)
+        code = ''.join('CD'[1 - r] for r in first) + ':' + ''.join('CD'[1 - r] for r in responses)
+        strategies.append(memory_n(f"m{n}-{code}", n, responses, first))
+    return strategies
+
+def stage_payoffs(game: Game) -> np.ndarray:
+    """
+    The stage game's payoffs for the tournament, from its payoff matrix.
+
+    @param game: A symmetric two-player game with two actions per player, cooperation first
+    @return: 2x2 array of the payoff to a player making move [own, opponent's]
+    """
+    payoffs = [np.asarray(payoff, dtype=float) for payoff in game.payoffs]
+    if len(payoffs) != 2 or payoffs[0].shape != (2, 2):
+        raise ValueError("Tournaments need a two-player game with two actions each")
+    if not np.array_equal(payoffs[0], payoffs[1].T):
+        raise ValueError("Tournaments need a symmetric game, so scores don't depend on the seat")
+    return payoffs[0]
+
+def stack_strategies(strategies: Sequence[Strategy]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pad every strategy to the same number of states and stack them.
+
+    @return: (cooperation probabilities, shape (strategies, states);
+              transitions, shape (strategies, states, 2, 2))
+    """
+    states = max(strategy.cooperate.shape[0] for strategy in strategies)
+    cooperate = np.zeros((len(strategies), states))
+    transitions = np.zeros((len(strategies), states, 2, 2), dtype=np.int32)
+    for k, strategy in enumerate(strategies):
+        cooperate[k, :strategy.cooperate.shape[0]] = strategy.cooperate
+        transitions[k, :strategy.transitions.shape[0]] = strategy.transitions
+    return cooperate, transitions
+
+def pair_index(i: int, count: int) -> int:
+    """
+    Position of the match (i, i) in the list of all matches (i, j) with
+    i <= j, which is ordered by i, then j.
+    """
+    return i * count - i * (i - 1) // 2
+
+def row_blocks(count: int, block_pairs: int) -> List[Tuple[int, int]]:
+    """
+    Split the matches into blocks of consecutive rows of about block_pairs matches.
+    """
+    blocks, start = [], 0
+    while start < count:
+        end = start + 1
+        while end < count and pair_index(end + 1, count) - pair_index(start, count) <= block_pairs:
+            end += 1
+        blocks.append((start, end))
+        start = end
+    return blocks
+
+# Tournament setup in each worker; set by init_tournament
+_setup = None
+
+def init_tournament(cooperate: np.ndarray, transitions: np.ndarray, payoffs: np.ndarray, rounds: int,
+                    noise: float, seed: int) -> None:
+    global _setup
+    # Chance of cooperating after noise flips the intended move
+    cooperate = cooperate * (1 - noise) + (1 - cooperate) * noise
+    stochastic = bool(((cooperate > 0) & (cooperate < 1)).any())
+    _setup = {
+        'count': cooperate.shape[0],
+        'states': cooperate.shape[1],
+        # Cooperate when a 32-bit draw is below the threshold
+        'thresholds': np.rint(cooperate * 2.0 ** 32).astype(np.int64).ravel(),
+        'defects': (cooperate < 0.5).ravel(),
+        'transitions': transitions.ravel(),
+        'payoffs': payoffs.ravel(),
+        'rounds': rounds,
+        'stochastic': stochastic,
+        'seed': seed,
+    }
+
+def play_block(block: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Play every match (i, j) with i in the block's rows and j >= i.
+
+    @return: (rows, columns, row strategy's total payoff, column strategy's total payoff)
+    """
+    setup = _setup
+    count, states = setup['count'], setup['states']
+    start, end = block
+    rows = np.concatenate([np.full(count - i, i) for i in range(start, end)])
+    columns = np.concatenate([np.arange(i, count) for i in range(start, end)])
+    matches = rows.size
+    first_pair = pair_index(start, count)
+
+    # Flat offsets of each strategy's rows in the stacked tables
+    row_base, column_base = rows * states, columns * states
+    row_state = np.zeros(matches, dtype=np.int64)
+    column_state = np.zeros(matches, dtype=np.int64)
+    row_score, column_score = np.zeros(matches), np.zeros(matches)
+    thresholds, defects = setup['thresholds'], setup['defects']
+    transitions, payoffs = setup['transitions'], setup['payoffs']
+    total_pairs = pair_index(count, count)
+    rng = CounterRNG(setup['seed']) if setup['stochastic'] else None
+
+    for round_number in range(setup['rounds']):
+        row_cell, column_cell = row_base + row_state, column_base + column_state
+        if rng is None:
+            row_move = defects[row_cell].astype(np.int64)
+            column_move = defects[column_cell].astype(np.int64)
+        else:
+            # Two draws per match per round, at a position set by the round
+            # and the match, whatever the blocks are
+            rng.seek(2 * (round_number * total_pairs + first_pair))
+            draws = rng.draws(2 * matches).reshape(matches, 2)
+            row_move = (draws[:, 0] >= thresholds[row_cell]).astype(np.int64)
+            column_move = (draws[:, 1] >= thresholds[column_cell]).astype(np.int64)
+        row_score += payoffs[2 * row_move + column_move]
+        column_score += payoffs[2 * column_move + row_move]
+        row_state = transitions[4 * row_cell + 2 * row_move + column_move]
+        column_state = transitions[4 * column_cell + 2 * column_move + row_move]
+    return rows, columns, row_score, column_score
+
+def run_tournament(strategies: Sequence[Strategy], game: Game, rounds: int, output: str, noise: float = 0.0,
+                   seed: int = 0, workers: int = 1, block_pairs: int = DEFAULT_BLOCK_PAIRS,
+                   verbose: bool = False) -> np.ndarray:
+    """
+    Play a round-robin tournament and write its score matrix to disk.
+
+    @param strategies: The entrants
+    @param game: Stage game; see stage_payoffs
+    @param rounds: Rounds per match
+    @param output: Path of the .npy file for the score matrix, where entry [i, j] is strategy
+                   i's average payoff per round against strategy j
+    @param noise: Chance that any move comes out as the opposite one
+    @param seed: Seed of the random draws for stochastic strategies and noise
+    @param workers: Worker processes; 1 plays in this process
+    @param block_pairs: Matches per block sent to a worker
+    @return: The score matrix, memory-mapped from the output file
+    """
+    count = len(strategies)
+    setup = stack_strategies(strategies) + (stage_payoffs(game), rounds, noise, seed)
+    scores = np.lib.format.open_memmap(output, mode='w+', dtype=np.float64, shape=(count, count))
+    blocks = row_blocks(count, block_pairs)
+    started = time.perf_counter()
+    done = 0
+
+    def record(result) -> None:
+        nonlocal done
+        rows, columns, row_score, column_score = result
+        scores[rows, columns] = row_score / rounds
+        scores[columns, rows] = column_score / rounds
+        done += rows.size
+        if verbose : print(f"{done:,} of {pair_index(count, count):,} matches, "
+                           f"{done * rounds / (time.perf_counter() - started):,.0f} match rounds/sec", file=sys.stderr)
+
+    if workers == 1:
+        init_tournament(*setup)
+        for block in blocks:
+            record(play_block(block))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_tournament, initargs=setup) as pool:
+            pending = set()
+            for block in blocks:
+                pending.add(pool.submit(play_block, block))
+                # Keep only a few blocks in flight, so finished ones are written out promptly
+                while len(pending) >= workers * INFLIGHT_PER_WORKER:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        record(future.result())
+            for future in pending:
+                record(future.result())
+    scores.flush()
+    return scores
+
+def ranking(scores: np.ndarray, block_rows: int = 1024) -> np.ndarray:
+    """
+    Each strategy's average score over all its matches, reading the matrix a block of rows at a time.
+    """
+    return np.concatenate([scores[start:start + block_rows].mean(axis=1) for start in range(0, scores.shape[0], block_rows)])
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Play a round-robin iterated Prisoner's Dilemma tournament.",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--strategies',
+                       default=','.join(classic_strategies()),
+                       help='Comma-separated classic strategies to enter (default: all of them: %(default)s)')
+    parser.add_argument('--random-memory',
+                       default=None,
+                       metavar='N:COUNT',
+                       help='Also enter COUNT random deterministic memory-N strategies')
+    parser.add_argument('-r', '--rounds',
+                       type=int,
+                       default=200,
+                       help='Rounds per match (default: 200)')
+    parser.add_argument('--noise',
+                       type=float,
+                       default=0.0,
+                       help='Chance that any move comes out as the opposite one (default: 0)')
+    parser.add_argument('-o', '--output',
+                       default='scores.npy',
+                       help='Where to write the score matrix (default: scores.npy)')
+    parser.add_argument('-s', '--seed',
+                       type=int,
+                       default=0,
+                       help='Random seed (default: 0)')
+    parser.add_argument('-w', '--workers',
+                       type=int,
+                       default=1,
+                       help='Worker processes (default: 1)')
+    parser.add_argument('--block-pairs',
+                       type=int,
+                       default=DEFAULT_BLOCK_PAIRS,
+                       help=f'Matches per block sent to a worker (default: {DEFAULT_BLOCK_PAIRS})')
+    parser.add_argument('--top',
+                       type=int,
+                       default=10,
+                       help='Strategies to list in the ranking (default: 10)')
+    parser.add_argument('-v', '--verbose',
+                       action='store_true',
+                       help='Report progress on stderr while running')
+    args = parser.parse_args()
+
+    classics = classic_strategies()
+    names = [name for name in args.strategies.split(',') if name]
+    unknown = [name for name in names if name not in classics]
+    if unknown:
+        parser.error(f"Unknown strategies: {', '.join(unknown)}; choose from {', '.join(classics)}")
+    args.entrants = [classics[name] for name in names]
+    if args.random_memory:
+        try:
+            n, count = (int(part) for part in args.random_memory.split(':'))
+        except ValueError:
+            parser.error("--random-memory takes N:COUNT, e.g. 2:1000")
+        if n < 1 or count < 0:
+            parser.error("--random-memory needs N of at least 1 and a non-negative COUNT")
+        args.entrants += random_memory_strategies(n, count, args.seed)
+    if not args.entrants:
+        parser.error("No strategies entered")
+    if args.rounds < 1:
+        parser.error("Number of rounds must be positive")
+    if not 0 <= args.noise <= 1:
+        parser.error("Noise must be between 0 and 1")
+    if args.workers < 1 or args.block_pairs < 1:
+        parser.error("Workers and block size must be positive")
+    return args
+
+if __name__ == '__main__':
+    args = parse_args()
+    game, _ = create_prisoners_dilemma()
+    count = len(args.entrants)
+
+    start_time = time.perf_counter()
+    scores = run_tournament(args.entrants, game, args.rounds, args.output, args.noise, args.seed, args.workers,
+                            args.block_pairs, args.verbose)
+    elapsed = time.perf_counter() - start_time
+    matches = pair_index(count, count)
+    print(f"{count:,} strategies, {matches:,} matches of {args.rounds:,} rounds in {elapsed:.2f}s "
+          f"({matches * args.rounds / elapsed:,.0f} match rounds/sec)")
+    print(f"Score matrix written to {args.output}")
+
+    averages = ranking(scores)
+    print(f"\nTop {min(args.top, count)} strategies by average score per round:")
+    for place, k in enumerate(np.argsort(-averages, kind='stable')[:args.top], 1):
+        print(f"{place:>4}. {args.entrants[k].name:<24} {averages[k]:.4f}")
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Iterative learning solvers for large two-player games.
+
+Both work directly on numeric payoff arrays, A for the row player and B for
+the column player, and report the exploitability of their current average
+strategies: how much the two players could gain in total by deviating to
+best responses. It is 0 exactly at a Nash equilibrium, and for zero-sum
+games it is the duality gap, which bounds the error of the value.
+
+- Fictitious play: each player best-responds to the other's empirical
+  average so far. The running payoffs against those averages are kept up to
+  date by adding one column of A and one row of B per iteration, so an
+  iteration costs O(rows + columns) however large the game, and so does
+  measuring exploitability.
+- Regret matching+: each player mixes in proportion to their positive
+  cumulative regrets, updated alternately, with iterations weighted
+  linearly in the average, as in CFR+. Each iteration costs two
+  matrix-vector products, and it usually converges much faster.
+
+Both converge in zero-sum games. In general-sum games neither is guaranteed
+to reach a Nash equilibrium, so the exploitability they report is the
+measure of how close they got.
+
+Both can warm-start from an earlier result, e.g. after the payoffs changed
+slightly, carrying over the counts or regrets accumulated so far.
+"""
+import time
+import argparse
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+LEARNING_METHODS = ('fictitious-play', 'regret-matching')
+
+@dataclass
+class LearningResult:
+    """Average strategies of a learning run, and the state needed to continue it."""
+    row_strategy: np.ndarray
+    column_strategy: np.ndarray
+    exploitability: float
+    iterations: int
+    converged: bool
+    # (iteration, exploitability) at every check
+    history: List[Tuple[int, float]] = field(default_factory=list)
+    # Accumulated counts (fictitious play) or regrets and weighted
+    # strategy sums (regret matching), for warm starts
+    state: dict = field(default_factory=dict)
+
+def exploitability(A: np.ndarray, B: np.ndarray, row_strategy: np.ndarray, column_strategy: np.ndarray) -> float:
+    """
+    Total amount both players could gain by deviating to best responses.
+    """
+    A, B = _payoff_arrays(A, B)
+    # Products in the payoffs' own precision, so float32 payoffs are never copied to float64
+    row_values = (A @ column_strategy.astype(A.dtype)).astype(float)
+    column_values = (row_strategy.astype(B.dtype) @ B).astype(float)
+    return float(row_values.max() - row_strategy @ row_values + column_values.max() - column_values @ column_strategy)
+
+def _payoff_arrays(A: np.ndarray, B: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The payoffs as floating-point arrays, keeping float32 if given.
+    """
+    A, B = np.asarray(A), np.asarray(B)
+    if A.shape != B.shape or A.ndim != 2:
+        raise ValueError("Payoffs must be two arrays of the same (rows, columns) shape")
+    return (A if np.issubdtype(A.dtype, np.floating) else A.astype(float),
+            B if np.issubdtype(B.dtype, np.floating) else B.astype(float))
+
+def _gap(row_values: np.ndarray, column_values: np.ndarray, row_strategy: np.ndarray, column_strategy: np.ndarray) -> float:
+    """
+    Exploitability from the payoffs of every action against the other player's strategy.
+    """
+    return float(row_values.max() - row_strategy @ row_values + column_values.max() - column_values @ column_strategy)
+
+def fictitious_play(A: np.ndarray, B: np.ndarray, tol: float = 1e-3, max_iterations: int = 1000000,
+                    check_every: int = 100, warm_start: Optional[LearningResult] = None,
+                    verbose: bool = False) -> LearningResult:
+    """
+    Approximate a Nash equilibrium by simultaneous fictitious play.
+
+    @param A: Row player's payoffs, shape (rows, columns); float32 halves the memory of huge games
+    @param B: Column player's payoffs, same shape
+    @param tol: Stop once exploitability is at most this
+    @param max_iterations: Stop after this many iterations even if tol isn't reached
+    @param check_every: Iterations between exploitability checks
+    @param warm_start: Earlier result to continue from; its counts are kept, and only the running
+                       payoffs are recomputed, which takes two matrix-vector products
+    @return: LearningResult
+    """
+    A, B = _payoff_arrays(A, B)
+    rows, columns = A.shape
+    if warm_start is not None and 'row_counts' in warm_start.state:
+        row_counts = warm_start.state['row_counts'].copy()
+        column_counts = warm_start.state['column_counts'].copy()
+        done = warm_start.iterations
+    else:
+        row_counts, column_counts = np.zeros(rows), np.zeros(columns)
+        done = 0
+    # Total payoff of every action against all the opponent's plays so far
+    row_values, column_values = np.zeros(rows), np.zeros(columns)
+    if done:
+        # From the average strategies, in the payoffs' own precision, scaled back up
+        row_values = (A @ (column_counts / done).astype(A.dtype)).astype(float) * done
+        column_values = ((row_counts / done).astype(B.dtype) @ B).astype(float) * done
+
+    history = []
+    gap = float('inf')
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        row_action = int(row_values.argmax())
+        column_action = int(column_values.argmax())
+        row_counts[row_action] += 1
+        column_counts[column_action] += 1
+        row_values += A[:, column_action]
+        column_values += B[row_action, :]
+
+        if iteration % check_every == 0 or iteration == max_iterations:
+            total = done + iteration
+            gap = _gap(row_values / total, column_values / total, row_counts / total, column_counts / total)
+            history.append((total, gap))
+            if verbose : print(f"Iteration {total:,}: exploitability {gap:.3g}")
+            if gap <= tol:
+                break
+
+    total = done + iteration
+    return LearningResult(row_counts / total, column_counts / total, gap, total, gap <= tol, history,
+                          {'row_counts': row_counts, 'column_counts': column_counts})
+
+def regret_matching(A: np.ndarray, B: np.ndarray, tol: float = 1e-3, max_iterations: int = 100000,
+                    check_every: int = 10, warm_start: Optional[LearningResult] = None,
+                    verbose: bool = False) -> LearningResult:
+    """
+    Approximate a Nash equilibrium by alternating regret matching+ with linear averaging.
+
+    @param A: Row player's payoffs, shape (rows, columns); float32 halves the memory of huge games
+    @param B: Column player's payoffs, same shape
+    @param tol: Stop once exploitability is at most this
+    @param max_iterations: Stop after this many iterations even if tol isn't reached
+    @param check_every: Iterations between exploitability checks, each costing two more matrix-vector products
+    @param warm_start: Earlier result to continue from; its regrets and averages are kept
+    @return: LearningResult
+    """
+    A, B = _payoff_arrays(A, B)
+    rows, columns = A.shape
+    if warm_start is not None and 'row_regrets' in warm_start.state:
+        state = warm_start.state
+        row_regrets, column_regrets = state['row_regrets'].copy(), state['column_regrets'].copy()
+        row_sum, column_sum = state['row_sum'].copy(), state['column_sum'].copy()
+        done = warm_start.iterations
+    else:
+        row_regrets, column_regrets = np.zeros(rows), np.zeros(columns)
+        row_sum, column_sum = np.zeros(rows), np.zeros(columns)
+        done = 0
+
+    history = []
+    gap = float('inf')
+    iteration = 0
+    row_strategy, column_strategy = _regret_strategy(row_regrets), _regret_strategy(column_regrets)
+    for iteration in range(1, max_iterations + 1):
+        total = done + iteration
+        # The row player moves first, then the column player answers the updated strategy
+        row_values = (A @ column_strategy.astype(A.dtype)).astype(float)
+        row_regrets = np.maximum(row_regrets + row_values - row_strategy @ row_values, 0)
+        row_strategy = _regret_strategy(row_regrets)
+        column_values = (row_strategy.astype(B.dtype) @ B).astype(float)
+        column_regrets = np.maximum(column_regrets + column_values - column_values @ column_strategy, 0)
+        column_strategy = _regret_strategy(column_regrets)
+        # Later iterations count more, as in CFR+
+        row_sum += total * row_strategy
+        column_sum += total * column_strategy
+
+        if iteration % check_every == 0 or iteration == max_iterations:
+            gap = exploitability(A, B, row_sum / row_sum.sum(), column_sum / column_sum.sum())
+            history.append((total, gap))
+            if verbose : print(f"Iteration {total:,}: exploitability {gap:.3g}")
+            if gap <= tol:
+                break
+
+    return LearningResult(row_sum / row_sum.sum(), column_sum / column_sum.sum(), gap, done + iteration, gap <= tol,
+                          history, {'row_regrets': row_regrets, 'column_regrets': column_regrets,
+                                    'row_sum': row_sum, 'column_sum': column_sum})
+
+def _regret_strategy(regrets: np.ndarray) -> np.ndarray:
+    """
+    Mix in proportion to positive regrets, or uniformly when there are none.
+    """
+    total = regrets.sum()
+    return regrets / total if total > 0 else np.full(regrets.shape, 1 / regrets.size)
+
+def learn_equilibrium(A: np.ndarray, B: np.ndarray, method: str = 'regret-matching', **options) -> LearningResult:
+    """
+    Run one of the LEARNING_METHODS; options are passed on to it.
+    """
+    if method == 'fictitious-play':
+        return fictitious_play(A, B, **options)
+    if method == 'regret-matching':
+        return regret_matching(A, B, **options)
+    raise ValueError(f"Unknown learning method {method}; choose from {', '.join(LEARNING_METHODS)}")
+
+def random_game(actions: int, zero_sum: bool = False, seed: int = None, dtype=np.float32) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    A random square game with uniform payoffs, for benchmarks.
+    """
+    rng = np.random.default_rng(seed)
+    A = rng.random((actions, actions), dtype=dtype)
+    return A, (-A if zero_sum else rng.random((actions, actions), dtype=dtype))
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Approximate a Nash equilibrium of a large random game by learning dynamics.',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('-n', '--actions',
+                       type=int,
+                       default=2000,
+                       help='Actions per player (default: 2000)')
+    parser.add_argument('--method',
+                       choices=LEARNING_METHODS,
+                       default='regret-matching',
+                       help='Learning dynamics (default: regret-matching)')
+    parser.add_argument('--zero-sum',
+                       action='store_true',
+                       help='Make the game zero-sum, where both methods are guaranteed to converge')
+    parser.add_argument('--tol',
+                       type=float,
+                       default=1e-3,
+                       help='Target exploitability (default: 1e-3)')
+    parser.add_argument('--max-iterations',
+                       type=int,
+                       default=None,
+                       help='Iteration limit (default: 1,000,000 for fictitious play, 100,000 for regret matching)')
+    parser.add_argument('--perturb',
+                       type=float,
+                       default=None,
+                       metavar='SCALE',
+                       help='Afterwards, perturb the payoffs by up to SCALE and re-solve with and without a warm start')
+    parser.add_argument('-s', '--seed',
+                       type=int,
+                       default=None,
+                       help='Random seed')
+    parser.add_argument('-v', '--verbose',
+                       action='store_true',
+                       help='Print exploitability at every check')
+    args = parser.parse_args()
+
+    if args.actions < 1:
+        parser.error("Number of actions must be positive")
+    if args.tol <= 0:
+        parser.error("Target exploitability must be positive")
+    if args.max_iterations is not None and args.max_iterations < 1:
+        parser.error("Iteration limit must be positive")
+    return args
+
+def run(A: np.ndarray, B: np.ndarray, args, warm_start: Optional[LearningResult] = None) -> LearningResult:
+    options = {'tol': args.tol, 'verbose': args.verbose, 'warm_start': warm_start}
+    if args.max_iterations is not None:
+        options['max_iterations'] = args.max_iterations
+    start_time = time.perf_counter()
+    result = learn_equilibrium(A, B, args.method, **options)
+    elapsed = time.perf_counter() - start_time
+    iterations = result.iterations - (warm_start.iterations if warm_start is not None else 0)
+    status = 'reached' if result.converged else 'did not reach'
+    print(f"{status.capitalize()} exploitability {args.tol:g} after {iterations:,} iterations in {elapsed:.2f}s: "
+          f"{result.exploitability:.3g}")
+    print(f"  Supports: {np.count_nonzero(result.row_strategy > 1e-6):,} row actions, "
+          f"{np.count_nonzero(result.column_strategy > 1e-6):,} column actions")
+    return result
+
+if __name__ == '__main__':
+    args = parse_args()
+    A, B = random_game(args.actions, args.zero_sum, args.seed)
+    print(f"{args.actions:,} x {args.actions:,} {'zero-sum' if args.zero_sum else 'general-sum'} game, {args.method}")
+    result = run(A, B, args)
+
+    if args.perturb is not None:
+        rng = np.random.default_rng(args.seed)
+        noise = rng.uniform(-args.perturb, args.perturb, A.shape).astype(A.dtype)
+        A = A + noise
+        B = -A if args.zero_sum else B + rng.uniform(-args.perturb, args.perturb, B.shape).astype(B.dtype)
+        print(f"\nPerturbed payoffs by up to {args.perturb:g}; from scratch:")
+        run(A, B, args)
+        print("Warm-started from the previous solution:")
+        run(A, B, args, result)
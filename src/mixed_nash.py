@@ -0,0 +1,208 @@
+"""
+Mixed-strategy Nash equilibria of two-player (bimatrix) games.
+
+Both solvers work on numeric payoff arrays: A holds the row player's payoffs
+and B the column player's, each of shape (rows, columns).
+
+- Support enumeration tries every pair of equal-sized supports and solves
+  the indifference conditions on each. It finds every equilibrium of a
+  nondegenerate game, but the number of supports grows exponentially, so it
+  is only for small games.
+- Lemke-Howson follows a path of complementary pivots from the artificial
+  equilibrium to a real one. It finds one equilibrium per starting label,
+  and each pivot costs O((rows + columns) * rows) or so, which keeps it
+  practical for games with hundreds of actions per player; restarting from
+  other labels sidesteps the occasional very long path. Ties in the ratio
+  test are broken lexicographically, so degenerate games don't cycle.
+"""
+import itertools
+from math import comb
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+# (row strategy, column strategy) as probability vectors
+Equilibrium = Tuple[np.ndarray, np.ndarray]
+
+# Numerical tolerance for probabilities and best-response checks
+TOLERANCE = 1e-9
+
+def count_supports(rows: int, columns: int) -> int:
+    """
+    Number of support pairs support enumeration tries.
+    """
+    return sum(comb(rows, k) * comb(columns, k) for k in range(1, min(rows, columns) + 1))
+
+def solve_indifference(payoffs: np.ndarray) -> Tuple[np.ndarray, float]:
+    """
+    Find the mixture of the columns of a square payoff block that makes every
+    row equally good.
+
+    @return: (probabilities, common payoff), or (None, None) if the block is singular
+    """
+    k = payoffs.shape[0]
+    system = np.zeros((k + 1, k + 1))
+    system[:k, :k] = payoffs
+    system[:k, k] = -1
+    system[k, :k] = 1
+    rhs = np.zeros(k + 1)
+    rhs[k] = 1
+    try:
+        solution = np.linalg.solve(system, rhs)
+    except np.linalg.LinAlgError:
+        return None, None
+    return solution[:k], solution[k]
+
+def support_enumeration(A: np.ndarray, B: np.ndarray, tol: float = TOLERANCE) -> Iterator[Equilibrium]:
+    """
+    Yield every equilibrium with supports of equal size.
+
+    @param A: Row player's payoffs
+    @param B: Column player's payoffs
+    @param tol: Tolerance of the probability and best-response checks
+    """
+    A, B = np.asarray(A, dtype=float), np.asarray(B, dtype=float)
+    rows, columns = A.shape
+    for k in range(1, min(rows, columns) + 1):
+        for row_support in itertools.combinations(range(rows), k):
+            for column_support in itertools.combinations(range(columns), k):
+                # The column mixture must make the row player indifferent on
+                # their support, and vice versa
+                y, row_value = solve_indifference(A[np.ix_(row_support, column_support)])
+                if y is None or (y < -tol).any():
+                    continue
+                x, column_value = solve_indifference(B[np.ix_(row_support, column_support)].T)
+                if x is None or (x < -tol).any():
+                    continue
+
+                row_strategy = np.zeros(rows)
+                row_strategy[list(row_support)] = np.clip(x, 0, None)
+                column_strategy = np.zeros(columns)
+                column_strategy[list(column_support)] = np.clip(y, 0, None)
+                # No action outside the supports may do better
+                if (A @ column_strategy > row_value + tol).any() or (row_strategy @ B > column_value + tol).any():
+                    continue
+                yield row_strategy / row_strategy.sum(), column_strategy / column_strategy.sum()
+
+def _pivot(tableau: np.ndarray, basis: List[int], entering: int, lexicographic: slice) -> int:
+    """
+    Bring a label into the basis of a tableau, returning the label that leaves.
+    """
+    column = tableau[:, entering]
+    candidates = np.flatnonzero(column > TOLERANCE)
+    if candidates.size == 0:
+        raise ValueError("Lemke-Howson ratio test found no pivot row")
+    # Lexicographic minimum ratio: the right-hand side first, then the
+    # columns of the initial basis in turn, all divided by the pivot column.
+    # Only rows still tied are compared on the next column, and ties are rare.
+    tied = candidates
+    for key in itertools.chain((tableau.shape[1] - 1,), range(lexicographic.start, lexicographic.stop)):
+        ratios = tableau[tied, key] / column[tied]
+        tied = tied[ratios <= ratios.min() + TOLERANCE]
+        if tied.size == 1:
+            break
+    row = tied[0]
+
+    tableau[row] /= tableau[row, entering]
+    factors = tableau[:, entering].copy()
+    factors[row] = 0
+    tableau -= np.outer(factors, tableau[row])
+    leaving, basis[row] = basis[row], entering
+    return leaving
+
+def lemke_howson(A: np.ndarray, B: np.ndarray, initial_label: int = 0, max_pivots: int = None) -> Equilibrium:
+    """
+    Find one equilibrium by complementary pivoting.
+
+    @param A: Row player's payoffs
+    @param B: Column player's payoffs
+    @param initial_label: Label dropped first: a row index, or rows + a column index;
+                          different labels can lead to different equilibria
+    @param max_pivots: Give up after this many pivots (default: unlimited)
+    @return: (row strategy, column strategy)
+    """
+    A, B = np.asarray(A, dtype=float), np.asarray(B, dtype=float)
+    rows, columns = A.shape
+    if not 0 <= initial_label < rows + columns:
+        raise ValueError(f"Initial label must be between 0 and {rows + columns - 1}")
+    # Equilibria don't change when payoffs are shifted, and the polytopes
+    # need strictly positive payoffs
+    A = A - A.min() + 1
+    B = B - B.min() + 1
+
+    # Labels 0..rows-1 are the row actions, rows..rows+columns-1 the column
+    # actions. The row tableau holds x (labels of the rows) with slacks for
+    # B^T x <= 1; the column tableau holds y with slacks for A y <= 1.
+    row_tableau = np.hstack((B.T, np.eye(columns), np.ones((columns, 1))))
+    row_basis = list(range(rows, rows + columns))
+    column_tableau = np.hstack((np.eye(rows), A, np.ones((rows, 1))))
+    column_basis = list(range(rows))
+
+    # The dropped label enters the tableau where it is nonbasic; from then on
+    # the label that leaves one tableau enters the other
+    tableaux = [(row_tableau, row_basis, slice(rows, rows + columns)), (column_tableau, column_basis, slice(0, rows))]
+    side = 0 if initial_label < rows else 1
+    entering = initial_label
+    for pivots in itertools.count():
+        if max_pivots is not None and pivots >= max_pivots:
+            raise RuntimeError(f"Lemke-Howson did not finish within {max_pivots} pivots")
+        leaving = _pivot(*tableaux[side][:2], entering, tableaux[side][2])
+        if leaving == initial_label:
+            break
+        entering = leaving
+        side = 1 - side
+
+    row_strategy = np.zeros(rows)
+    for i, label in enumerate(row_basis):
+        if label < rows:
+            row_strategy[label] = row_tableau[i, -1]
+    column_strategy = np.zeros(columns)
+    for i, label in enumerate(column_basis):
+        if label >= rows:
+            column_strategy[label - rows] = column_tableau[i, -1]
+    return row_strategy / row_strategy.sum(), column_strategy / column_strategy.sum()
+
+def lemke_howson_restarts(A: np.ndarray, B: np.ndarray, max_pivots: int = None) -> Equilibrium:
+    """
+    Find one equilibrium with Lemke-Howson, trying every starting label.
+
+    Path lengths vary wildly between starting labels (tens of pivots for one,
+    hundreds of thousands for the next on the same game), so every label gets
+    a pivot budget, and the budget grows fourfold each time all labels exceed it.
+
+    @param max_pivots: Largest budget to try before giving up (default: unlimited)
+    @return: (row strategy, column strategy)
+    """
+    labels = sum(np.shape(A))
+    budget = 2 * labels
+    while True:
+        for label in range(labels):
+            try:
+                return lemke_howson(A, B, label, budget)
+            except RuntimeError:
+                pass
+        if max_pivots is not None and budget >= max_pivots:
+            raise RuntimeError(f"Lemke-Howson did not finish within {max_pivots} pivots from any label")
+        budget = 4 * budget if max_pivots is None else min(4 * budget, max_pivots)
+
+def is_equilibrium(A: np.ndarray, B: np.ndarray, row_strategy: np.ndarray, column_strategy: np.ndarray,
+                   tol: float = 1e-7) -> bool:
+    """
+    Whether neither player can gain more than tol by deviating.
+    """
+    A, B = np.asarray(A, dtype=float), np.asarray(B, dtype=float)
+    row_payoffs = A @ column_strategy
+    column_payoffs = row_strategy @ B
+    return row_payoffs.max() <= row_strategy @ row_payoffs + tol and column_payoffs.max() <= column_payoffs @ column_strategy + tol
+
+def unique_equilibria(equilibria, decimals: int = 9) -> List[Equilibrium]:
+    """
+    Drop equilibria that repeat an earlier one up to rounding.
+    """
+    seen, unique = set(), []
+    for row_strategy, column_strategy in equilibria:
+        key = (tuple(np.round(row_strategy, decimals)), tuple(np.round(column_strategy, decimals)))
+        if key not in seen:
+            seen.add(key)
+            unique.append((row_strategy, column_strategy))
+    return unique
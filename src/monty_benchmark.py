@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Monty Hall simulators.
+
+Measures tests per second and peak memory for every combination of method,
+door count and test count, plus the verbose path and which_door on its own.
+Results can be saved as a JSON baseline, and a later run compared against it
+fails when any case has regressed by more than a threshold.
+"""
+import io
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Callable, Dict, List
+
+from monty_hall import RevealedDoors, run_method, which_door
+
+BENCHMARK_METHODS = ('deduction', 'physical', 'compact', 'vectorized')
+
+def measure(run: Callable[[], None], calls: int, repeats: int) -> Dict[str, float]:
+    """
+    Time a benchmark case and measure its peak memory.
+
+    @param run: Runs the case once
+    @param calls: Number of tests (or calls) one run performs
+    @param repeats: Number of timed runs; the fastest one is reported
+    @return: Dict with the best wall-clock time, rate and peak memory
+    """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    # Memory is measured in a separate, untimed run, since tracing
+    # allocations slows the code down
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'seconds': best, 'per_second': calls / best, 'peak_bytes': peak}
+
+def simulation_case(method: str, num_doors: int, num_tests: int, verbose: bool) -> Callable[[], None]:
+    def run():
+        if verbose:
+            # The verbose path's cost is mostly formatting and writing text,
+            # so it writes to a real (in-memory) stream rather than nowhere
+            with redirect_stdout(io.StringIO()):
+                run_method(method, num_tests, num_doors, True, seed=0)
+        else:
+            run_method(method, num_tests, num_doors, False, seed=0)
+    return run
+
+def which_door_case(num_doors: int, calls: int, compact: bool) -> Callable[[], None]:
+    chosen, kept = 1, num_doors
+    if compact:
+        exposed = RevealedDoors(num_doors, chosen, kept)
+    else:
+        exposed = [door for door in range(1, num_doors + 1) if door != chosen and door != kept]
+
+    def run():
+        for _ in range(calls):
+            which_door(exposed, chosen, True, num_doors)
+    return run
+
+def run_benchmarks(methods: List[str], doors: List[int], num_tests: List[int], verbose_tests: int,
+                   which_door_calls: int, repeats: int) -> Dict[str, Dict[str, float]]:
+    """
+    Run the whole benchmark matrix.
+
+    @return: Dict mapping case names to their measurements
+    """
+    cases = {}
+    for method in methods:
+        for num_doors in doors:
+            for n in num_tests:
+                cases[f"{method}/doors={num_doors}/tests={n}"] = (simulation_case(method, num_doors, n, False), n)
+            if verbose_tests:
+                cases[f"{method}/doors={num_doors}/tests={verbose_tests}/verbose"] = (
+                    simulation_case(method, num_doors, verbose_tests, True), verbose_tests)
+    if which_door_calls:
+        for num_doors in doors:
+            cases[f"which_door/doors={num_doors}/list"] = (which_door_case(num_doors, which_door_calls, False), which_door_calls)
+            cases[f"which_door/doors={num_doors}/compact"] = (which_door_case(num_doors, which_door_calls, True), which_door_calls)
+
+    results = {}
+    for name, (run, calls) in cases.items():
+        results[name] = measure(run, calls, repeats)
+        print(f"{name:<50} {results[name]['per_second']:>14,.0f}/s {results[name]['peak_bytes'] / 1024:>10,.1f} KiB",
+              file=sys.stderr)
+    return results
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """
+    Compare results with a baseline.
+
+    @param threshold: Largest allowed relative slowdown or memory growth, e.g. 0.2 for 20%
+    @return: Descriptions of every regression found
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]
+        if result['per_second'] < old['per_second'] * (1 - threshold):
+            regressions.append(f"{name}: {result['per_second']:,.0f}/s, baseline {old['per_second']:,.0f}/s "
+                               f"({result['per_second'] / old['per_second'] - 1:+.1%})")
+        if result['peak_bytes'] > old['peak_bytes'] * (1 + threshold):
+            regressions.append(f"{name}: peak {result['peak_bytes']:,} bytes, baseline {old['peak_bytes']:,} bytes "
+                               f"({result['peak_bytes'] / max(old['peak_bytes'], 1) - 1:+.1%})")
+    return regressions
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Benchmark the Monty Hall simulators and check for regressions against a baseline.',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('-m', '--methods',
+                       default=','.join(BENCHMARK_METHODS),
+                       help=f'Comma-separated methods to benchmark (default: {",".join(BENCHMARK_METHODS)})')
+    parser.add_argument('-d', '--doors',
+                       default='3,100',
+                       help='Comma-separated door counts (default: 3,100)')
+    parser.add_argument('-n', '--num-tests',
+                       default='10000,100000',
+                       help='Comma-separated test counts (default: 10000,100000)')
+    parser.add_argument('--verbose-tests',
+                       type=int,
+                       default=2000,
+                       help='Tests per verbose-path case, 0 to skip them (default: 2000)')
+    parser.add_argument('--which-door-calls',
+                       type=int,
+                       default=10000,
+                       help='Calls per which_door case, 0 to skip them (default: 10000)')
+    parser.add_argument('-r', '--repeats',
+                       type=int,
+                       default=3,
+                       help='Timed runs per case; the fastest is kept (default: 3)')
+    parser.add_argument('--save',
+                       default=None,
+                       help='Write the results to this JSON file, for use as a baseline')
+    parser.add_argument('--baseline',
+                       default=None,
+                       help='Compare against this JSON baseline and exit with status 1 on a regression')
+    parser.add_argument('-t', '--threshold',
+                       type=float,
+                       default=0.2,
+                       help='Allowed slowdown or memory growth relative to the baseline (default: 0.2)')
+    args = parser.parse_args()
+
+    args.methods = [method.strip() for method in args.methods.split(',')]
+    for method in args.methods:
+        if method not in BENCHMARK_METHODS:
+            parser.error(f"Unknown method {method!r}; choose from {', '.join(BENCHMARK_METHODS)}")
+    args.doors = [int(d) for d in args.doors.split(',')]
+    args.num_tests = [int(float(n)) for n in args.num_tests.split(',')]
+    if min(args.doors) < 3:
+        parser.error("Number of doors must be >= 3")
+    if min(args.num_tests) < 1:
+        parser.error("Number of tests must be positive")
+    if args.repeats < 1:
+        parser.error("Number of repeats must be positive")
+    if args.threshold < 0:
+        parser.error("Threshold must be non-negative")
+    return args
+
+if __name__ == '__main__':
+    args = parse_args()
+
+    results = run_benchmarks(args.methods, args.doors, args.num_tests, args.verbose_tests,
+                             args.which_door_calls, args.repeats)
+
+    if args.save:
+        with open(args.save, 'w') as out:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': results,
+            }, out, indent=2, sort_keys=True)
+        print(f"Saved results to {args.save}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"- {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
@@ -6,10 +6,56 @@ program simulation of the Monty Hall problem.
 author: Christopher Sprague
 """
 
+import os
+import json
 import random
 import sys
 import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from fractions import Fraction
+from statistics import NormalDist
+
+import numpy as np
+
+from counter_rng import MAX_SPAN, CounterRNG
+from monty_metrics import NULL_METRICS, Metrics, profiled
+from monty_trace import TraceWriter
+from host_variants import HOST_VARIANTS, BiasedHost, ClassicHost, OpenKHost, RefusingHost
+from switch_policies import evaluate_policies, parse_policy, policy_grid, singled_out_doors
+
+# Number of tests drawn per batch by the vectorized engine. Large enough to
+# amortise NumPy call overhead, small enough to keep memory use bounded.
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+# Random draws used by every test: the car, then your pick. Test k of a
+# seeded run always uses draws TEST_DRAWS * k onwards of its CounterRNG
+# stream, whichever method runs it.
+TEST_DRAWS = 2
+
+# Format version written into checkpoint files
+CHECKPOINT_VERSION = 1
+
+# Tests per worker in the first segment of a checkpointed run
+CHECKPOINT_FIRST_SEGMENT = 1 << 16
+
+# Simulation methods selectable from the command line, with the label
+# printed when each one runs.
+METHODS = {
+    'deduction': 'deductive method (default)',
+    'physical': 'physical simulation model',
+    'compact': 'compact physical simulation model',
+    'vectorized': 'vectorized method',
+    'stream': 'streaming method',
+    'variant': 'variant host method',
+    'policies': 'switching policy method',
+    'exact': 'exact analytic method',
+}
+
+# Largest |z| of a simulated rate from the exact one that --validate accepts.
+# A correct simulator exceeds 4 about once in 16,000 runs per rate.
+DEFAULT_MAX_Z = 4.0
 
 def parse_args():
     parser = argparse.ArgumentParser(
@@ -23,28 +69,262 @@ def parse_args():
     
     parser.add_argument('-n', '--num-tests',
                        type=int,
-                       default=100000,
-                       help='Number of test runs to perform (default: 100000)')
+                       default=None,
+                       help='Number of test runs to perform (default: 100000; with --stream, the maximum to run)')
     
     parser.add_argument('-d', '--doors',
                        type=int,
                        default=3,
                        help='Number of doors in the simulation (default: 3)')
     
-    parser.add_argument('--physical',
+    method = parser.add_mutually_exclusive_group()
+    method.add_argument('--physical',
                        action='store_true',
                        help='Run the detailed, physical simulation model.')
 
+    parser.add_argument('--compact',
+                       action='store_true',
+                       help='With --physical, store the revealed doors as "all except two" so each test costs O(1) for any number of doors.')
+
+    parser.add_argument('--record-revealed',
+                       action='store_true',
+                       help='With --physical --compact -v, print the full list of revealed doors for each test.')
+
+    method.add_argument('--vectorized',
+                       action='store_true',
+                       help='Run the batched NumPy engine (fastest for large -n).')
+
+    method.add_argument('--exact',
+                       action='store_true',
+                       help='Compute the exact win probabilities instead of simulating.')
+
+    method.add_argument('--stream',
+                       action='store_true',
+                       help='Run the vectorized engine chunk by chunk, stopping once --target-width or --alpha is reached.')
+
+    parser.add_argument('--host',
+                       choices=sorted(HOST_VARIANTS),
+                       default=None,
+                       help='Play against a variant host with its batched kernel (default: the classic vectorized method)')
+
+    parser.add_argument('--host-k',
+                       type=int,
+                       default=1,
+                       help='With --host=open-k, the number of goat doors the host opens (default: 1)')
+
+    parser.add_argument('--host-bias',
+                       type=float,
+                       default=1.0,
+                       help='With --host=biased, how often the host keeps his preferred door closed (default: 1)')
+
+    parser.add_argument('--host-observe',
+                       choices=BiasedHost.OBSERVATIONS,
+                       default='any',
+                       help='With --host=biased, only count games where the host kept this door closed (default: any)')
+
+    parser.add_argument('--offer-if-car',
+                       type=float,
+                       default=1.0,
+                       help='With --host=refuse, chance of being offered the switch when you picked the car (default: 1)')
+
+    parser.add_argument('--offer-if-goat',
+                       type=float,
+                       default=1.0,
+                       help='With --host=refuse, chance of being offered the switch when you picked a goat (default: 1)')
+
+    parser.add_argument('--validate',
+                       action='store_true',
+                       help='Compare the simulated win rates with the exact ones and exit with status 1 if they deviate')
+
+    parser.add_argument('--max-z',
+                       type=float,
+                       default=DEFAULT_MAX_Z,
+                       help=f'With --validate, the largest accepted deviation in standard errors (default: {DEFAULT_MAX_Z:g})')
+
+    parser.add_argument('--policy',
+                       action='append',
+                       default=[],
+                       help='Evaluate a switching policy: a probability such as 0.5, or per first pick such as "1=0,*=1"; repeatable')
+
+    parser.add_argument('--policy-grid',
+                       type=int,
+                       default=None,
+                       help='Evaluate policies switching with probability 0, 1/(N-1), ..., 1 on the same draws')
+
+    parser.add_argument('--chunk-size',
+                       type=int,
+                       default=DEFAULT_CHUNK_SIZE,
+                       help=f'Tests per batch for --vectorized, --stream and policies (default: {DEFAULT_CHUNK_SIZE})')
+
+    parser.add_argument('--confidence',
+                       type=float,
+                       default=0.95,
+                       help='Confidence level of the intervals reported by --stream and policies (default: 0.95)')
+
+    parser.add_argument('--target-width',
+                       type=float,
+                       default=None,
+                       help='With --stream, stop once both confidence intervals are at most this wide')
+
+    parser.add_argument('--alpha',
+                       type=float,
+                       default=None,
+                       help='With --stream, stop once switching and staying differ at this significance level')
+
+    parser.add_argument('--series',
+                       default=None,
+                       help='With --stream, write the convergence series as CSV to this file (- for stdout)')
+
+    parser.add_argument('--trace',
+                       default=None,
+                       help='Write a compact binary record of each test to this file (read it back with monty_trace.py)')
+
+    parser.add_argument('--trace-sample',
+                       type=int,
+                       default=1,
+                       help='With --trace, only trace every Nth test (default: 1, every test)')
+
+    parser.add_argument('--timings',
+                       action='store_true',
+                       help='Print tests per second, peak memory and the time spent in each phase')
+
+    parser.add_argument('--metrics',
+                       default=None,
+                       help='Export run metrics to this file: Prometheus text if it ends in .prom, JSON otherwise')
+
+    parser.add_argument('--profile',
+                       default=None,
+                       help='Run under cProfile and write the stats to this file')
+
+    parser.add_argument('--profile-sample',
+                       default=None,
+                       help='Run under the sampling profiler and write collapsed stacks (for flame graphs) to this file')
+
+    parser.add_argument('--profile-interval',
+                       type=float,
+                       default=0.005,
+                       help='Seconds between sampling profiler samples (default: 0.005)')
+
+    parser.add_argument('--checkpoint',
+                       default=None,
+                       help='Save progress to this file periodically, so the run can be resumed with --resume')
+
+    parser.add_argument('--checkpoint-interval',
+                       type=float,
+                       default=60.0,
+                       help='Seconds of simulation between checkpoints (default: 60)')
+
+    parser.add_argument('--resume',
+                       default=None,
+                       help='Continue the run saved in this checkpoint file; its settings replace -n, -d, -s and the method')
+
+    parser.add_argument('-w', '--workers',
+                       type=int,
+                       default=1,
+                       help='Split the tests across this many processes (default: 1)')
+
+    parser.add_argument('-s', '--seed',
+                       type=int,
+                       default=None,
+                       help='Master seed; the same seed always gives the same results')
+
+    parser.add_argument('--first-test',
+                       type=int,
+                       default=0,
+                       help='Index of the first test to run, for splitting one seeded run into shards (default: 0)')
+
     args = parser.parse_args()
     
     # Validate arguments
     if args.doors < 3:
         parser.error("Number of doors must be >= 3")
-    if args.num_tests < 1:
+    # The exact engine draws no random numbers, so only simulations are capped
+    if args.doors > MAX_SPAN and not args.exact:
+        parser.error(f"Number of doors must be <= {MAX_SPAN} (no limit with --exact)")
+    if args.num_tests is None and not args.stream:
+        args.num_tests = 100000
+    if args.num_tests is not None and args.num_tests < 1:
         parser.error("Number of tests must be positive")
+    if args.stream and args.num_tests is None and args.target_width is None and args.alpha is None:
+        parser.error("--stream needs at least one of -n, --target-width or --alpha to know when to stop")
+    if not 0 < args.confidence < 1:
+        parser.error("Confidence level must be between 0 and 1")
+    if args.target_width is not None and not 0 < args.target_width < 1:
+        parser.error("Target width must be between 0 and 1")
+    if args.alpha is not None and not 0 < args.alpha < 1:
+        parser.error("Significance level must be between 0 and 1")
+    if (args.target_width is not None or args.alpha is not None or args.series) and not args.stream:
+        parser.error("--target-width, --alpha and --series require --stream")
+    if args.chunk_size < 1:
+        parser.error("Chunk size must be positive")
+    if args.compact and not args.physical:
+        parser.error("--compact requires --physical")
+    if args.record_revealed and not args.compact:
+        parser.error("--record-revealed requires --physical --compact")
+    if args.workers < 1:
+        parser.error("Number of workers must be positive")
+    if args.workers > 1 and args.verbose:
+        parser.error("-v cannot be combined with --workers")
+    if args.workers > 1 and args.stream:
+        parser.error("--stream cannot be combined with --workers")
+    if args.trace_sample < 1:
+        parser.error("Trace sample interval must be positive")
+    if args.trace and not (args.physical or args.vectorized) or args.trace and args.workers > 1:
+        parser.error("--trace requires --physical or --vectorized, without --workers")
+    if args.profile_interval <= 0:
+        parser.error("Profile interval must be positive")
+    if args.checkpoint_interval <= 0:
+        parser.error("Checkpoint interval must be positive")
+    if (args.checkpoint or args.resume) and (args.stream or args.host is not None or args.trace):
+        parser.error("--checkpoint and --resume cannot be combined with --stream, --host or --trace")
+    args.policies = []
+    if args.policy or args.policy_grid is not None:
+        if args.physical or args.stream or args.host is not None or args.trace or args.checkpoint or args.resume:
+            parser.error("--policy and --policy-grid cannot be combined with --physical, --stream, --host, --trace or checkpoints")
+        if args.workers > 1:
+            parser.error("--policy and --policy-grid cannot be combined with --workers")
+        if args.policy_grid is not None and args.policy_grid < 2:
+            parser.error("A policy grid needs at least 2 points")
+        try:
+            args.policies = [parse_policy(spec, args.doors) for spec in args.policy]
+        except ValueError as e:
+            parser.error(f"Bad --policy: {e}")
+        if args.policy_grid is not None:
+            args.policies += policy_grid(args.policy_grid)
+    if args.exact and (args.validate or args.policies or args.checkpoint or args.resume or args.trace or args.workers > 1):
+        parser.error("--exact cannot be combined with --validate, policies, checkpoints, --trace or --workers")
+    if args.validate and args.policies:
+        parser.error("--validate cannot be combined with --policy or --policy-grid")
+    if args.max_z <= 0:
+        parser.error("Maximum z-score must be positive")
+    if args.first_test < 0:
+        parser.error("First test index must be non-negative")
+    if args.first_test and args.seed is None:
+        parser.error("--first-test requires --seed, so that the shards belong to the same run")
+    if args.host is not None:
+        if args.first_test:
+            parser.error("--first-test cannot be combined with --host")
+        if args.physical or args.vectorized or args.stream or args.trace or args.workers > 1:
+            parser.error("--host runs its own batched kernel and cannot be combined with --physical, --vectorized, "
+                         "--stream, --trace or --workers")
+        try:
+            args.host = make_host(args.host, args)
+        except ValueError as e:
+            parser.error(str(e))
+        if isinstance(args.host, OpenKHost) and args.host.k > args.doors - 2:
+            parser.error(f"The host can open at most {args.doors - 2} doors with {args.doors} doors")
         
     return args
 
+def make_host(name: str, args):
+    if name == 'open-k':
+        return OpenKHost(args.host_k)
+    if name == 'biased':
+        return BiasedHost(args.host_bias, args.host_observe)
+    if name == 'refuse':
+        return RefusingHost(args.offer_if_car, args.offer_if_goat)
+    return HOST_VARIANTS[name]()
+
 """
 program usage statement
 """
@@ -54,12 +334,79 @@ def usage():
     print(" -n=(#)      specify the number of tests to run. more tests=higher accuracy")
     print(" -d=(#)      specify the number of doors in the simulation.")
     print(" --physical      run the physical simulation model instead of the deduction method.")
+    print(" --compact      with --physical, reveal doors in O(1) per test (for very large door counts).")
+    print(" --record-revealed      with --compact -v, print every revealed door for each test.")
+    print(" --vectorized      run the batched NumPy engine instead of the deduction method.")
+    print(" --stream      run the vectorized engine until a precision target is reached.")
+    print(" --host=(variant)      play against a variant host: " + ", ".join(sorted(HOST_VARIANTS)) + ".")
+    print(" --host-k=(#)      with --host=open-k, the number of doors the host opens.")
+    print(" --host-bias=(#)      with --host=biased, how often the host keeps his preferred door closed.")
+    print(" --host-observe=(door)      with --host=biased, only count games where that door was kept closed.")
+    print(" --offer-if-car=(#) --offer-if-goat=(#)      with --host=refuse, chance of being offered the switch.")
+    print(" --exact      compute the exact win probabilities instead of simulating.")
+    print(" --validate      check the simulated win rates against the exact ones.")
+    print(" --max-z=(#)      with --validate, the largest accepted deviation in standard errors.")
+    print(" --policy=(spec)      evaluate a switching policy, e.g. 0.5 or 1=0,*=1; repeatable.")
+    print(" --policy-grid=(#)      evaluate policies switching with probability 0..1 on the same draws.")
+    print(" --chunk-size=(#)      number of tests per batch for the vectorized engine.")
+    print(" --confidence=(#)      confidence level of the --stream intervals.")
+    print(" --target-width=(#)      with --stream, stop once both intervals are this narrow.")
+    print(" --alpha=(#)      with --stream, stop once switching is significantly better or worse.")
+    print(" --series=(file)      with --stream, write the convergence series as CSV.")
+    print(" --trace=(file)      write a binary record of each test, for monty_trace.py.")
+    print(" --trace-sample=(#)      with --trace, only trace every Nth test.")
+    print(" --timings      print tests per second, peak memory and per-phase timings.")
+    print(" --metrics=(file)      export run metrics as JSON, or Prometheus text for .prom files.")
+    print(" --profile=(file)      run under cProfile and save the stats.")
+    print(" --profile-sample=(file)      run under the sampling profiler and save collapsed stacks.")
+    print(" --checkpoint=(file)      periodically save progress to this file.")
+    print(" --checkpoint-interval=(#)      seconds between checkpoints.")
+    print(" --resume=(file)      continue the run saved in a checkpoint file.")
+    print(" -w=(#)      split the tests across this many worker processes.")
+    print(" -s=(#)      master seed, for reproducible runs.")
+    print(" --first-test=(#)      with -s, start at this test index, to split one run into shards.")
     print(" -h      print usage/help statement")
     sys.exit(0)
 
+class RevealedDoors:
+    """
+    The doors opened by the host, stored as "every door except two" instead of
+    as a list. Membership, length and finding the other closed door are O(1)
+    regardless of the number of doors; iterating materialises the full set
+    and is only meant for tracing.
+    """
+    __slots__ = ('num_doors', 'chosen', 'kept')
+
+    def __init__(self, num_doors: int, chosen: int, kept: int):
+        self.num_doors = num_doors
+        self.chosen = chosen
+        self.kept = kept
+
+    def __contains__(self, door: int) -> bool:
+        return 1 <= door <= self.num_doors and door != self.chosen and door != self.kept
+
+    def __len__(self) -> int:
+        return self.num_doors - 2
+
+    def __iter__(self):
+        return (door for door in range(1, self.num_doors + 1)
+                if door != self.chosen and door != self.kept)
+
+    def __str__(self) -> str:
+        return f"all doors except {min(self.chosen, self.kept)} and {max(self.chosen, self.kept)}"
+
+    def other_closed(self, chosen: int) -> int:
+        if chosen == self.chosen:
+            return self.kept
+        if chosen == self.kept:
+            return self.chosen
+        raise ValueError(f"door {chosen} is not one of the closed doors")
+
 def which_door(exposed_list: list, chosen: int, switch: bool, num_doors: int):
     if not switch:
         return chosen
+    if isinstance(exposed_list, RevealedDoors):
+        return exposed_list.other_closed(chosen)
     # Since we know there's exactly one unexposed door besides the chosen one,
     # we can find it by checking the one exposed door
     for door in range(1, num_doors + 1):
@@ -67,25 +414,26 @@ def which_door(exposed_list: list, chosen: int, switch: bool, num_doors: int):
             return door
     raise Exception('No doors left - logic bug :(')
 
-def run_physical_method(switch_door: bool, verbose: bool = False, num_doors: int = 3, num_tests: int = 1, start_time=0):
+def run_physical_method(switch_door: bool, verbose: bool = False, num_doors: int = 3, num_tests: int = 1, rng=random, trace=None):
     win_switch = 0
     win_no_switch = 0
 
     if verbose : print('----- Simulation Start -----')
 
     for i in range(num_tests):
-        the_car = random.randint(1, num_doors) # where the car is
-        your_door = random.randint(1, num_doors) # the door you pick.
+        the_car = rng.randint(1, num_doors) # where the car is
+        your_door = rng.randint(1, num_doors) # the door you pick.
 
         if verbose : print(f"\n--- Test {i+1} ---")
         if verbose : print("Car door           = " + str(the_car))
         if verbose : print("The door you chose = " + str(your_door))
 
-        # We only need to expose enough doors to leave one other option besides the chosen door
-        # First, find a door that's not the car and not the chosen door to keep unrevealed
+        # We only need to expose enough doors to leave one other option besides the chosen door.
+        # The host never opens the car: if you missed it, the car is the door he keeps closed,
+        # otherwise he keeps the first goat door that isn't yours.
         keep_unrevealed = None
         for j in range(1, num_doors + 1):
-            if j != the_car and j != your_door:
+            if j != your_door and (j == the_car or the_car == your_door):
                 keep_unrevealed = j
                 break
 
@@ -98,6 +446,45 @@ def run_physical_method(switch_door: bool, verbose: bool = False, num_doors: int
 
         # Pass num_doors to which_door
         your_selection = which_door(exposed_list, your_door, switch_door, num_doors)
+        if trace is not None and trace.sampled(i): trace.record(i, the_car, your_door, keep_unrevealed, your_selection)
+
+        if your_selection == the_car:
+            if verbose : print("You win!")
+            win_switch += 1
+        else:
+            if verbose : print("Sorry, you lose! (Alternatively, if you were trying to get the goat, you win!)")
+            win_no_switch += 1
+
+    return win_switch, win_no_switch
+
+def run_compact_physical_method(switch_door: bool, verbose: bool = False, num_doors: int = 3, num_tests: int = 1, record_revealed: bool = False, rng=random, trace=None):
+    win_switch = 0
+    win_no_switch = 0
+
+    if verbose : print('----- Simulation Start -----')
+
+    for i in range(num_tests):
+        the_car = rng.randint(1, num_doors) # where the car is
+        your_door = rng.randint(1, num_doors) # the door you pick.
+
+        if verbose : print(f"\n--- Test {i+1} ---")
+        if verbose : print("Car door           = " + str(the_car))
+        if verbose : print("The door you chose = " + str(your_door))
+
+        # Same host as run_physical_method, but the door he keeps closed is found
+        # directly instead of by scanning, so a test costs the same for any door count.
+        if the_car != your_door:
+            keep_unrevealed = the_car
+        else:
+            keep_unrevealed = 1 if your_door != 1 else 2
+
+        exposed = RevealedDoors(num_doors, your_door, keep_unrevealed)
+
+        if verbose : print("Revealed (goats)   = " + str(list(exposed) if record_revealed else exposed))
+        if verbose : print("Switch             = " + str(switch_door))
+
+        your_selection = which_door(exposed, your_door, switch_door, num_doors)
+        if trace is not None and trace.sampled(i): trace.record(i, the_car, your_door, keep_unrevealed, your_selection)
 
         if your_selection == the_car:
             if verbose : print("You win!")
@@ -108,15 +495,15 @@ def run_physical_method(switch_door: bool, verbose: bool = False, num_doors: int
 
     return win_switch, win_no_switch
 
-def run_deduction_method(num_tests: int, num_doors: int, verbose: bool, start_time=0):
+def run_deduction_method(num_tests: int, num_doors: int, verbose: bool, rng=random):
     win_switch = 0
     win_no_switch = 0
 
     # Run single simulation and track both outcomes
     for i in range(num_tests):
         # We are simulating the *initial* random choice only.
-        the_car = random.randint(1, num_doors)
-        your_door = random.randint(1, num_doors)
+        the_car = rng.randint(1, num_doors)
+        your_door = rng.randint(1, num_doors)
 
         # If you stick with your door
         if your_door == the_car:
@@ -128,36 +515,578 @@ def run_deduction_method(num_tests: int, num_doors: int, verbose: bool, start_ti
     
     return win_switch, win_no_switch
 
+def door_dtype(num_doors: int):
+    # Smallest unsigned type that can hold every door number; narrower
+    # types make both the draws and the comparisons cheaper.
+    if num_doors <= np.iinfo(np.uint32).max:
+        return np.uint32
+    return np.uint64
+
+def run_vectorized_method(num_tests: int, num_doors: int, verbose: bool, chunk_size: int = DEFAULT_CHUNK_SIZE, rng=None, trace=None,
+                          metrics=NULL_METRICS):
+    with metrics.phase('setup'):
+        if rng is None:
+            rng = CounterRNG(np.random.SeedSequence().entropy)
+        dtype = door_dtype(num_doors)
+        win_no_switch = 0
+
+    # Same model as the deduction method, but the car and pick positions are
+    # drawn a chunk at a time and the wins are counted with one reduction.
+    for offset in range(0, num_tests, chunk_size):
+        size = min(chunk_size, num_tests - offset)
+        with metrics.phase('rng'):
+            doors = rng.integers(1, num_doors, size=(size, 2), dtype=dtype, endpoint=True)
+            the_car, your_door = doors[:, 0], doors[:, 1]
+
+        with metrics.phase('decision'):
+            stayed_on_car = the_car == your_door
+        with metrics.phase('aggregation'):
+            win_no_switch += int(np.count_nonzero(stayed_on_car))
+
+        # Traced tests are played out as the physical model would, with the
+        # host keeping the car closed if you missed it and otherwise the
+        # lowest-numbered door that isn't yours, and the player switching.
+        if trace is not None:
+            rows = trace.sampled_slice(offset, size)
+            car, pick = the_car[rows], your_door[rows]
+            kept = np.where(car != pick, car, np.where(pick == 1, 2, 1).astype(dtype))
+            trace.record_batch(offset, car, pick, kept, kept)
+
+        if verbose : print(f"Tests {offset + 1:,}-{offset + size:,}: {win_no_switch:,} wins when not switching so far")
+
+    # Every test lost by sticking with your door is won by switching
+    return num_tests - win_no_switch, win_no_switch
+
+def run_variant_method(host, num_tests: int, num_doors: int, verbose: bool, chunk_size: int = DEFAULT_CHUNK_SIZE, rng=None,
+                       metrics=NULL_METRICS):
+    with metrics.phase('setup'):
+        if rng is None:
+            rng = np.random.default_rng()
+        dtype = door_dtype(num_doors)
+        win_switch = 0
+        win_no_switch = 0
+        counted = 0
+
+    # Same batching as run_vectorized_method; what the host does with each
+    # batch is up to the variant's kernel, whose time (including any draws of
+    # its own) counts as decision logic.
+    for offset in range(0, num_tests, chunk_size):
+        size = min(chunk_size, num_tests - offset)
+        with metrics.phase('rng'):
+            doors = rng.integers(1, num_doors, size=(size, 2), dtype=dtype, endpoint=True)
+            the_car, your_door = doors[:, 0], doors[:, 1]
+
+        with metrics.phase('decision'):
+            win_s, win_n, count = host.kernel(the_car, your_door, num_doors, rng)
+        with metrics.phase('aggregation'):
+            win_switch += win_s
+            win_no_switch += win_n
+            counted += count
+
+        if verbose : print(f"Tests {offset + 1:,}-{offset + size:,}: {counted:,} counted, {win_switch:,} switch wins, {win_no_switch:,} stay wins so far")
+
+    return win_switch, win_no_switch, counted
+
+def run_policy_method(policies: list, num_tests: int, num_doors: int, verbose: bool, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                      rng=None, metrics=NULL_METRICS):
+    with metrics.phase('setup'):
+        if rng is None:
+            rng = CounterRNG(np.random.SeedSequence().entropy)
+        dtype = door_dtype(num_doors)
+        # One group per door some policy singles out, then one for the rest
+        doors = singled_out_doors(policies).astype(dtype)
+        games = np.zeros(doors.size + 1, dtype=np.int64)
+        stay_wins = np.zeros(doors.size + 1, dtype=np.int64)
+
+    # The same draws as run_vectorized_method; every policy is then scored
+    # from the per-group counts, so extra policies cost nothing per test.
+    for offset in range(0, num_tests, chunk_size):
+        size = min(chunk_size, num_tests - offset)
+        with metrics.phase('rng'):
+            draws = rng.integers(1, num_doors, size=(size, 2), dtype=dtype, endpoint=True)
+            the_car, your_door = draws[:, 0], draws[:, 1]
+
+        with metrics.phase('decision'):
+            stayed_on_car = the_car == your_door
+            if doors.size:
+                index = np.searchsorted(doors, your_door)
+                singled_out = doors[np.minimum(index, doors.size - 1)] == your_door
+                group = np.where(singled_out, index, doors.size)
+
+        with metrics.phase('aggregation'):
+            if doors.size:
+                games += np.bincount(group, minlength=games.size)
+                stay_wins += np.bincount(group[stayed_on_car], minlength=games.size)
+            else:
+                games[0] += size
+                stay_wins[0] += int(np.count_nonzero(stayed_on_car))
+
+        if verbose : print(f"Tests {offset + 1:,}-{offset + size:,}: {int(stay_wins.sum()):,} first picks won so far")
+
+    return games, stay_wins
+
+def print_policy_summary(policies: list, games: np.ndarray, stay_wins: np.ndarray, confidence: float, time_taken: float):
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    rates, errors, _, _ = evaluate_policies(policies, games, stay_wins)
+    best = int(np.argmax(rates))
+    rates, errors, differences, difference_errors = evaluate_policies(policies, games, stay_wins, best)
+    width = max(len(policy.name) for policy in policies)
+
+    print("\n" + "="*50)
+    print("           POLICY SUMMARY")
+    print("="*50)
+    print(f"{confidence:.0%} intervals; differences are against the best policy, on the same draws")
+    for policy, rate, error, difference, difference_error in zip(policies, rates, errors, differences, difference_errors):
+        print(f"{policy.name:<{width}}  {rate:.4%} +/- {z * error:.4%}  ({difference:+.4%} +/- {z * difference_error:.4%})")
+    print(f"Best policy: {policies[best].name}, out of {int(games.sum()):,} tests")
+    print(f"Total simulation time = {time_taken:.4f}")
+    print("="*50)
+
+def exact_probabilities(num_doors: int, host=None):
+    """
+    Exact probabilities that switching and staying win, under the rules of
+    run_physical_method or of a variant host.
+
+    @param host: A host_variants.HostVariant; the classic host when not given
+    @return: (switch, stay) as Fractions
+    """
+    if num_doors < 3:
+        raise ValueError("Number of doors must be >= 3")
+    return (host or ClassicHost()).exact(num_doors)
+
+def z_score(wins: int, num_tests: int, p: Fraction) -> float:
+    """
+    Deviation of a simulated win count from its exact probability, in standard errors.
+    """
+    deviation = wins - num_tests * p
+    if p in (0, 1):
+        # No variance: any deviation at all is infinitely unlikely
+        return 0.0 if deviation == 0 else float('inf') if deviation > 0 else float('-inf')
+    return float(deviation) / float(num_tests * p * (1 - p)) ** 0.5
+
+def print_validation(win_switch: int, win_no_switch: int, num_tests: int, exact, max_z: float) -> bool:
+    """
+    Print how far the simulated rates are from the exact ones.
+
+    @return: Whether both are within max_z standard errors
+    """
+    passed = True
+    for label, wins, p in (('switching', win_switch, exact[0]), ('NOT switching', win_no_switch, exact[1])):
+        z = z_score(wins, num_tests, p)
+        passed = passed and abs(z) <= max_z
+        print(f"Exact rate when {label}: {p} = {float(p):.6%}, simulated {wins / num_tests:.6%}, z = {z:+.2f}")
+    print(f"Validation {'passed' if passed else 'FAILED'} (|z| <= {max_z:g})")
+    return passed
+
+def print_exact_summary(exact, time_taken: float):
+    print("\n" + "="*50)
+    print("           EXACT PROBABILITIES")
+    print("="*50)
+    print(f"Success rate when switching doors: {exact[0]} = {float(exact[0]) * 100:.6f}%")
+    print(f"Success rate when NOT switching doors: {exact[1]} = {float(exact[1]) * 100:.6f}%")
+    print(f"Total computation time = {time_taken:.6f}")
+    print("="*50)
+
+def wilson_interval(wins: int, num_tests: int, z: float):
+    # Wilson score interval: unlike the normal approximation it stays inside
+    # [0, 1] and behaves well for the tiny win rates of many-door games.
+    p = wins / num_tests
+    denominator = 1 + z * z / num_tests
+    centre = (p + z * z / (2 * num_tests)) / denominator
+    half_width = z * ((p * (1 - p) + z * z / (4 * num_tests)) / num_tests) ** 0.5 / denominator
+    return centre - half_width, centre + half_width
+
+def run_streaming_method(num_doors: int, max_tests: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, confidence: float = 0.95,
+                         target_width: float = None, alpha: float = None, rng=None, series=None, verbose: bool = False,
+                         metrics=NULL_METRICS):
+    with metrics.phase('setup'):
+        if rng is None:
+            rng = CounterRNG(np.random.SeedSequence().entropy)
+        dtype = door_dtype(num_doors)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        num_tests = 0
+        win_no_switch = 0
+
+    if series is not None:
+        print("tests,switch_rate,switch_low,switch_high,stay_rate,stay_low,stay_high,p_value", file=series)
+
+    # Only running totals are kept between chunks, so memory use is the same
+    # for a thousand tests or a trillion.
+    while max_tests is None or num_tests < max_tests:
+        size = chunk_size if max_tests is None else min(chunk_size, max_tests - num_tests)
+        with metrics.phase('rng'):
+            doors = rng.integers(1, num_doors, size=(size, 2), dtype=dtype, endpoint=True)
+            the_car, your_door = doors[:, 0], doors[:, 1]
+        with metrics.phase('decision'):
+            stayed_on_car = the_car == your_door
+
+        with metrics.phase('aggregation'):
+            win_no_switch += int(np.count_nonzero(stayed_on_car))
+            num_tests += size
+
+            win_switch = num_tests - win_no_switch
+            switch_low, switch_high = wilson_interval(win_switch, num_tests, z)
+            stay_low, stay_high = wilson_interval(win_no_switch, num_tests, z)
+
+            # Switching wins exactly when staying loses, so "switching and staying
+            # are equally good" is the hypothesis that switching wins half the time.
+            p_value = 2 * NormalDist().cdf(-abs(win_switch - num_tests / 2) / (num_tests / 4) ** 0.5)
+
+        if series is not None:
+            print(f"{num_tests},{win_switch / num_tests:.8f},{switch_low:.8f},{switch_high:.8f},"
+                  f"{win_no_switch / num_tests:.8f},{stay_low:.8f},{stay_high:.8f},{p_value:.6g}", file=series, flush=True)
+        if verbose : print(f"Tests {num_tests:,}: switch {switch_low:.4%}-{switch_high:.4%}, stay {stay_low:.4%}-{stay_high:.4%}")
+
+        # Stopping at the first chunk that meets the target means checking
+        # repeatedly, which makes --alpha somewhat optimistic; use a stricter
+        # level than you would for a single fixed-size test.
+        if target_width is not None and max(switch_high - switch_low, stay_high - stay_low) <= target_width:
+            break
+        if alpha is not None and p_value < alpha:
+            break
+
+    return num_tests - win_no_switch, win_no_switch, num_tests
+
+def run_method(method: str, num_tests: int, num_doors: int, verbose: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE,
+               seed: int = None, record_revealed: bool = False, first_test: int = 0, trace=None, metrics=NULL_METRICS):
+    # Runs tests first_test..first_test+num_tests-1 of the run defined by
+    # seed. The counter-based stream jumps straight to the first test, so any
+    # split of a run into shards gives exactly the same totals as one piece.
+    with metrics.phase('setup'):
+        rng = CounterRNG(seed if seed is not None else np.random.SeedSequence().entropy, TEST_DRAWS * first_test)
+
+    if method == 'vectorized':
+        return run_vectorized_method(num_tests, num_doors, verbose, chunk_size, rng, trace, metrics)
+    if trace is not None and method not in ('physical', 'compact'):
+        raise ValueError(f"The {method} method cannot be traced")
+
+    # The pure-Python methods interleave drawing, deciding and counting for
+    # every test, so they are timed as one phase. The physical models play the
+    # switching strategy, so their losses are exactly the tests that sticking
+    # with your door would have won.
+    with metrics.phase('simulation'):
+        if method == 'physical':
+            return run_physical_method(True, verbose, num_doors, num_tests, rng=rng, trace=trace)
+        if method == 'compact':
+            return run_compact_physical_method(True, verbose, num_doors, num_tests, record_revealed, rng, trace)
+        if method == 'deduction':
+            return run_deduction_method(num_tests, num_doors, verbose, rng=rng)
+    raise ValueError(f"Unknown simulation method: {method}")
+
+def run_trial_range(method: str, num_doors: int, seed: int, start: int, stop: int, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    return run_method(method, stop - start, num_doors, False, chunk_size, seed, first_test=start)
+
+def _run_worker(task: tuple):
+    method, num_doors, seed, start, stop, chunk_size = task
+    return run_trial_range(method, num_doors, seed, start, stop, chunk_size)
+
+def run_parallel(method: str, num_tests: int, num_doors: int, workers: int, seed: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 first_test: int = 0, pool: ProcessPoolExecutor = None):
+    # Every worker runs a contiguous, non-overlapping range of tests from the
+    # seed's counter-based stream, so the totals are fully determined by the
+    # seed and don't even depend on the worker count.
+    bounds = [first_test + num_tests * i // workers for i in range(workers + 1)]
+    tasks = [(method, num_doors, seed, start, stop, chunk_size)
+             for start, stop in zip(bounds, bounds[1:]) if stop > start]
+
+    if pool is not None:
+        results = list(pool.map(_run_worker, tasks))
+    else:
+        with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+            results = list(pool.map(_run_worker, tasks))
+
+    # map() yields results in submission order, so the merge is deterministic
+    return sum(r[0] for r in results), sum(r[1] for r in results)
+
+def run_vectorized_segments(sizes: list, num_doors: int, rng, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    # One vectorized run split into consecutive segments of the given sizes,
+    # returning (win_switch, win_no_switch) for each. Lets many small runs
+    # share the cost of one large one.
+    dtype = door_dtype(num_doors)
+    boundaries = np.cumsum(sizes)
+    num_tests = int(boundaries[-1]) if len(sizes) else 0
+    # Stay wins among the first boundaries[i] tests, filled in chunk by chunk
+    stay_before = np.zeros(len(sizes), dtype=np.int64)
+    stay_total = 0
+
+    for offset in range(0, num_tests, chunk_size):
+        size = min(chunk_size, num_tests - offset)
+        doors = rng.integers(1, num_doors, size=(size, 2), dtype=dtype, endpoint=True)
+        stay_cumulative = np.cumsum(doors[:, 0] == doors[:, 1], dtype=np.int64)
+
+        # Segments ending inside this chunk
+        first, last = np.searchsorted(boundaries, [offset + 1, offset + size + 1])
+        stay_before[first:last] = stay_total + stay_cumulative[boundaries[first:last] - offset - 1]
+        stay_total += int(stay_cumulative[-1])
+
+    stay = np.diff(stay_before, prepend=0)
+    return [(int(n) - int(w), int(w)) for n, w in zip(sizes, stay)]
+
+@dataclass
+class SimulationResult:
+    """
+    Outcome of a simulate() call.
+    """
+    method: str
+    num_doors: int
+    num_tests: int
+    seed: int
+    first_test: int
+    win_switch: int
+    win_no_switch: int
+    # Games that count towards the win rates; fewer than num_tests only for
+    # host variants that condition on what the host did
+    counted: int
+    seconds: float
+
+    @property
+    def switch_rate(self) -> float:
+        return self.win_switch / self.counted if self.counted else float('nan')
+
+    @property
+    def stay_rate(self) -> float:
+        return self.win_no_switch / self.counted if self.counted else float('nan')
+
+def simulate(num_tests: int = 100000, num_doors: int = 3, method: str = 'vectorized', seed: int = None, first_test: int = 0,
+             workers: int = 1, host=None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> SimulationResult:
+    """
+    Run a simulation without printing anything.
+
+    @param method: One of deduction, physical, compact or vectorized
+    @param seed: Master seed; drawn at random (and reported in the result) when not given
+    @param first_test: Index of the first test, for running one shard of a larger seeded run
+    @param workers: Number of worker processes
+    @param host: A host_variants.HostVariant to play against instead of the classic host; runs
+                 in one process from the start of the seed's stream, so first_test and workers must be left unset
+    @return: SimulationResult with the win counts and rates
+    """
+    if num_doors < 3:
+        raise ValueError("Number of doors must be >= 3")
+    if num_tests < 1:
+        raise ValueError("Number of tests must be positive")
+    if method not in ('deduction', 'physical', 'compact', 'vectorized'):
+        raise ValueError(f"Unknown simulation method: {method}")
+    if host is not None and (first_test or workers > 1):
+        raise ValueError("A host variant runs its own batched kernel and cannot be combined with first_test or workers")
+    seed = seed if seed is not None else np.random.SeedSequence().entropy
+    started = time.perf_counter()
+
+    counted = num_tests
+    if host is not None:
+        method = 'variant'
+        win_s, win_n, counted = run_variant_method(host, num_tests, num_doors, False, chunk_size, np.random.default_rng(seed))
+    elif workers > 1:
+        win_s, win_n = run_parallel(method, num_tests, num_doors, workers, seed, chunk_size, first_test)
+    else:
+        win_s, win_n = run_method(method, num_tests, num_doors, False, chunk_size, seed, first_test=first_test)
+
+    return SimulationResult(method, num_doors, num_tests, seed, first_test, win_s, win_n, counted,
+                            time.perf_counter() - started)
+
+def save_checkpoint(path: str, state: dict):
+    # Write to a temporary file and rename it over the old checkpoint, so a
+    # run killed mid-write always leaves a complete checkpoint behind.
+    temporary = path + '.tmp'
+    with open(temporary, 'w') as out:
+        json.dump(state, out, indent=2)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(temporary, path)
+
+def load_checkpoint(path: str) -> dict:
+    with open(path) as f:
+        state = json.load(f)
+    if state.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} checkpoint")
+    return state
+
+def run_checkpointed(state: dict, path: str, interval: float = 60.0, chunk_size: int = DEFAULT_CHUNK_SIZE, workers: int = 1,
+                     metrics=NULL_METRICS, verbose: bool = False):
+    # Runs the tests a checkpoint state still has to do, in segments sized to
+    # take about interval seconds each, saving the state after every one.
+    # Tests are addressed by index in the counter-based stream, so the RNG
+    # state is just the next test's index and a resumed run gives exactly
+    # the same totals as an uninterrupted one.
+    method, num_doors, seed = state['method'], state['doors'], state['seed']
+    # Start small to measure the speed, then grow towards the interval
+    segment = CHECKPOINT_FIRST_SEGMENT * workers
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while state['tests_done'] < state['num_tests']:
+            size = min(segment, state['num_tests'] - state['tests_done'])
+            start = state['first_test'] + state['tests_done']
+            started = time.perf_counter()
+            if pool is not None:
+                with metrics.phase('simulation'):
+                    win_s, win_n = run_parallel(method, size, num_doors, workers, seed, chunk_size, start, pool)
+            else:
+                win_s, win_n = run_method(method, size, num_doors, verbose, chunk_size, seed, first_test=start, metrics=metrics)
+            elapsed = time.perf_counter() - started
+
+            state['tests_done'] += size
+            state['win_switch'] += win_s
+            state['win_no_switch'] += win_n
+            state['rng_position'] = TEST_DRAWS * (state['first_test'] + state['tests_done'])
+            with metrics.phase('checkpoint'):
+                save_checkpoint(path, state)
+
+            # Aim the next segment at the interval, growing at most 4x at a time
+            segment = max(1, min(int(size * interval / max(elapsed, 1e-9)), 4 * size))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return state['win_switch'], state['win_no_switch']
+
+def print_timings(metrics: Metrics):
+    print(f"Tests per second = {metrics.tests_per_second:,.0f}")
+    peak = metrics.peak_memory_bytes()
+    if peak is not None:
+        print(f"Peak memory = {peak / 2**20:,.1f} MiB")
+    for name, seconds in sorted(metrics.phases.items(), key=lambda item: -item[1]):
+        print(f"  {name:<12} {seconds:.4f}s ({seconds / metrics.wall_seconds:.1%})")
+    print("="*50)
+
 def print_simulation_summary(win_switch: int, win_no_switch: int, num_tests: int, time_taken: float):
     print("\n" + "="*50)
     print("           SIMULATION SUMMARY")
     print("="*50)
     print(f"Success rate when switching doors: {(win_switch / num_tests * 100):.2f}%")
     print(f"Success rate when NOT switching doors: {(win_no_switch / num_tests * 100):.2f}%")
+    print(f"Wins: {win_switch:,} switching, {win_no_switch:,} not switching, out of {num_tests:,}")
     print(f"Total simulation time = {time_taken:.4f}")
     print("="*50)
 
 
 if __name__ == '__main__':
-    # Keep track of start time for accurate output reporting
-    start_time = time.time()
-
     args = parse_args()
+
+    # Start the clock after argument parsing, so only the simulation is timed
+    start_time = time.time()
     
     # Set necessary variables from args
     verbose = args.verbose
     num_tests = args.num_tests
     num_doors = args.doors
+    checkpoint = None
+    resumed_from = 0
+
+    # A resumed run takes its settings from the checkpoint
+    if args.resume:
+        try:
+            checkpoint = load_checkpoint(args.resume)
+        except (OSError, ValueError) as e:
+            sys.exit(f"Cannot resume: {e}")
+        num_tests = checkpoint['num_tests']
+        num_doors = checkpoint['doors']
+        args.seed = checkpoint['seed']
+        args.first_test = checkpoint['first_test']
+        args.checkpoint = args.checkpoint or args.resume
+        resumed_from = checkpoint['tests_done']
+        print(f"Resuming {args.resume} at test {checkpoint['tests_done']:,}")
     
-    print(f"Number of simulations: {num_tests:,}")
+    if args.exact:
+        try:
+            exact = exact_probabilities(num_doors, args.host)
+        except ValueError as e:
+            sys.exit(str(e))
+        print(f"Number of doors: {num_doors}")
+        if args.host is not None:
+            print(f"--- Host: {args.host.describe()} ---")
+        print_exact_summary(exact, time.time() - start_time)
+        sys.exit(0)
+
+    print(f"Number of simulations: {num_tests:,}" if num_tests else "Number of simulations: until the target is reached")
     print(f"Number of doors per simulation: {num_doors}")
     
     # Determine which method to run
-    if args.physical:
-        print("\n--- Running physical simulation model. ---")
-        win_s, win_n = run_physical_method(False, verbose, num_doors, num_tests, start_time)
-        print_simulation_summary(win_s, win_n, num_tests, time.time() - start_time)
+    if checkpoint is not None:
+        method = checkpoint['method']
+    elif args.physical:
+        method = 'compact' if args.compact else 'physical'
+    elif args.vectorized:
+        method = 'vectorized'
+    elif args.stream:
+        method = 'stream'
+    elif args.host is not None:
+        method = 'variant'
+    elif args.policies:
+        method = 'policies'
+    else:
+        method = 'deduction'
+
+    # Without an explicit seed, draw one and report it so the run can be repeated
+    seed = args.seed if args.seed is not None else np.random.SeedSequence().entropy
+    print(f"Seed: {seed}")
+
+    metrics = Metrics(method=method, doors=num_doors, workers=args.workers)
+
+    print(f"\n--- Running {METHODS[method]}. ---")
+    with profiled(args.profile, args.profile_sample, args.profile_interval):
+        if method == 'stream':
+            series = None
+            if args.series == '-':
+                series = sys.stdout
+            elif args.series:
+                series = open(args.series, 'w')
+            try:
+                rng = CounterRNG(seed, TEST_DRAWS * args.first_test)
+                win_s, win_n, num_tests = run_streaming_method(num_doors, num_tests, args.chunk_size, args.confidence,
+                                                               args.target_width, args.alpha, rng, series, verbose, metrics)
+            finally:
+                if series is not None and series is not sys.stdout:
+                    series.close()
+            print(f"Stopped after {num_tests:,} tests")
+        elif method == 'variant':
+            print(f"--- Host: {args.host.describe()} ---")
+            # Variant hosts make extra draws of their own, so they use an
+            # ordinary generator rather than the test-indexed stream
+            rng = np.random.default_rng(seed)
+            win_s, win_n, counted = run_variant_method(args.host, num_tests, num_doors, verbose, args.chunk_size, rng, metrics)
+        elif method == 'policies':
+            rng = CounterRNG(seed, TEST_DRAWS * args.first_test)
+            games, stay_wins = run_policy_method(args.policies, num_tests, num_doors, verbose, args.chunk_size, rng, metrics)
+        elif args.checkpoint:
+            if checkpoint is None:
+                checkpoint = {
+                    'version': CHECKPOINT_VERSION, 'method': method, 'doors': num_doors, 'seed': seed,
+                    'first_test': args.first_test, 'num_tests': num_tests, 'tests_done': 0,
+                    'win_switch': 0, 'win_no_switch': 0, 'rng_position': TEST_DRAWS * args.first_test,
+                }
+            win_s, win_n = run_checkpointed(checkpoint, args.checkpoint, args.checkpoint_interval, args.chunk_size,
+                                            args.workers, metrics, verbose)
+            print(f"Checkpoint saved to {args.checkpoint}")
+        elif args.workers > 1:
+            print(f"--- Using {args.workers} worker processes. ---")
+            # The workers' phases aren't collected; only the totals are
+            with metrics.phase('simulation'):
+                win_s, win_n = run_parallel(method, num_tests, num_doors, args.workers, seed, args.chunk_size, args.first_test)
+        elif args.trace:
+            with TraceWriter(args.trace, num_doors, True, args.trace_sample, args.first_test, seed=seed, method=method) as trace:
+                win_s, win_n = run_method(method, num_tests, num_doors, verbose, args.chunk_size,
+                                          seed, args.record_revealed, args.first_test, trace, metrics)
+            print(f"Traced {trace.records:,} tests to {args.trace}")
+        else:
+            win_s, win_n = run_method(method, num_tests, num_doors, verbose, args.chunk_size,
+                                      seed, args.record_revealed, args.first_test, metrics=metrics)
+    metrics.finish(num_tests - resumed_from)
+
+    if method == 'variant':
+        if counted < num_tests:
+            print(f"Counted {counted:,} of {num_tests:,} games")
+        if counted == 0:
+            print("No games matched the host's conditions; try more tests")
+            sys.exit(1)
+        num_tests = counted
+
+    if method == 'policies':
+        print_policy_summary(args.policies, games, stay_wins, args.confidence, time.time() - start_time)
     else:
-        print("\n--- Running deductive method (default). ---")
-        win_s, win_n = run_deduction_method(num_tests, num_doors, verbose, start_time)
         print_simulation_summary(win_s, win_n, num_tests, time.time() - start_time)
+    if args.timings:
+        print_timings(metrics)
+    if args.metrics:
+        metrics.write(args.metrics)
+    if args.validate:
+        exact = exact_probabilities(num_doors, args.host if method == 'variant' else None)
+        if not print_validation(win_s, win_n, num_tests, exact, args.max_z):
+            sys.exit(1)
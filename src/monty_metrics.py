@@ -0,0 +1,203 @@
+"""
+Instrumentation for Monty Hall simulation runs.
+
+Metrics collects per-phase timings (setup, RNG generation, decision logic,
+aggregation), test counts and peak memory, and exports them as JSON or in
+the Prometheus text exposition format. The batched engines time every chunk;
+the pure-Python engines report their whole loop as one phase, since timing
+every test would cost more than the test itself.
+
+Two optional profiler hooks are provided: cProfile, and a lightweight
+sampling profiler that writes collapsed stacks for flame graphs.
+"""
+import sys
+import json
+import time
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows; peak memory is left out of the metrics there
+    resource = None
+
+PHASES = ('setup', 'rng', 'decision', 'aggregation', 'simulation')
+
+class Metrics:
+    """
+    Timings and counters for one simulation run.
+    """
+    def __init__(self, **labels):
+        """
+        @param labels: Fields identifying the run (method, doors, ...), exported with every metric
+        """
+        self.labels = labels
+        self.phases: Dict[str, float] = {}
+        self.num_tests = 0
+        self.wall_seconds = 0.0
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a block of code and add it to the named phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self, num_tests: int) -> None:
+        """
+        Record the number of tests run and stop the wall clock.
+        """
+        self.num_tests = num_tests
+        self.wall_seconds = time.perf_counter() - self._started
+
+    @property
+    def tests_per_second(self) -> float:
+        return self.num_tests / self.wall_seconds if self.wall_seconds else 0.0
+
+    @staticmethod
+    def peak_memory_bytes() -> Optional[int]:
+        """
+        Peak resident set size of this process so far, or None where the
+        platform can't report it. Worker processes are not included.
+        """
+        if resource is None:
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    def to_dict(self) -> dict:
+        result = {
+            'labels': self.labels,
+            'num_tests': self.num_tests,
+            'wall_seconds': self.wall_seconds,
+            'tests_per_second': self.tests_per_second,
+            'phase_seconds': dict(self.phases),
+        }
+        peak = self.peak_memory_bytes()
+        if peak is not None:
+            result['peak_memory_bytes'] = peak
+        return result
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """
+        Render the metrics in the Prometheus text exposition format.
+        """
+        labels = ','.join(f'{key}="{value}"' for key, value in sorted(self.labels.items()))
+
+        def sample(name: str, value, extra: str = '') -> str:
+            all_labels = ','.join(part for part in (labels, extra) if part)
+            return f"{name}{{{all_labels}}} {value}" if all_labels else f"{name} {value}"
+
+        lines = [
+            '# HELP monty_tests_total Number of Monty Hall tests simulated in this run.',
+            '# TYPE monty_tests_total gauge',
+            sample('monty_tests_total', self.num_tests),
+            '# HELP monty_wall_seconds Wall-clock time of the simulation, excluding argument parsing.',
+            '# TYPE monty_wall_seconds gauge',
+            sample('monty_wall_seconds', repr(self.wall_seconds)),
+            '# HELP monty_tests_per_second Simulation throughput.',
+            '# TYPE monty_tests_per_second gauge',
+            sample('monty_tests_per_second', repr(self.tests_per_second)),
+        ]
+        peak = self.peak_memory_bytes()
+        if peak is not None:
+            lines.extend([
+                '# HELP monty_peak_memory_bytes Peak resident set size of the parent simulator process, excluding worker processes.',
+                '# TYPE monty_peak_memory_bytes gauge',
+                sample('monty_peak_memory_bytes', peak),
+            ])
+        lines.extend([
+            '# HELP monty_phase_seconds Time spent in each phase of the simulation.',
+            '# TYPE monty_phase_seconds gauge',
+        ])
+        lines.extend(sample('monty_phase_seconds', repr(seconds), f'phase="{name}"')
+                     for name, seconds in sorted(self.phases.items()))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str) -> None:
+        """
+        Export to a file: Prometheus text for .prom files, JSON otherwise.
+        """
+        with open(path, 'w') as out:
+            out.write(self.to_prometheus() if path.endswith('.prom') else self.to_json() + '\n')
+
+class NullMetrics:
+    """
+    Stand-in used when a run isn't instrumented; every phase is a no-op.
+    """
+    _context = nullcontext()
+
+    def phase(self, name: str):
+        return self._context
+
+NULL_METRICS = NullMetrics()
+
+class SamplingProfiler:
+    """
+    Samples the stack of the thread that started it at a fixed interval from
+    a background thread, and writes the counts as collapsed stacks
+    ("outer;inner;leaf count" lines), the input format of flame graph tools.
+    Much cheaper than cProfile for long runs, at the cost of precision.
+    """
+    def __init__(self, path: str, interval: float = 0.005):
+        """
+        @param path: File to write the collapsed stacks to
+        @param interval: Seconds between samples
+        """
+        self.path = path
+        self.interval = interval
+        self.samples = Counter()
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                stack.append(f"{frame.f_code.co_name} ({frame.f_code.co_filename.rsplit('/', 1)[-1]}:{frame.f_code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.samples[';'.join(reversed(stack))] += 1
+
+    def __enter__(self) -> 'SamplingProfiler':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        with open(self.path, 'w') as out:
+            for stack, count in self.samples.most_common():
+                out.write(f"{stack} {count}\n")
+
+@contextmanager
+def profiled(cprofile_path: str = None, sample_path: str = None, interval: float = 0.005):
+    """
+    Run a block under cProfile and/or the sampling profiler, when paths are given.
+    """
+    profile = cProfile.Profile() if cprofile_path else None
+    sampler = SamplingProfiler(sample_path, interval) if sample_path else nullcontext()
+    with sampler:
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                profile.dump_stats(cprofile_path)
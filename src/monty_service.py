@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Long-running local service for Monty Hall simulations.
+
+Answers queries over HTTP, as JSON or as monty_hall.proto messages, without
+a process spawn per query. Queries that arrive within a short batching window
+and share their parameters are answered by a single vectorized run: unseeded
+queries get consecutive, disjoint ranges of the service's own counter-based
+stream, and seeded queries with the same seed and first test are prefixes of
+the same range, so one run of the longest covers them all. Repeated queries
+are served from an LRU cache.
+
+Endpoints:
+    POST /simulate   JSON object or SimulationRequest body
+    GET  /simulate   the same fields as query parameters
+    GET  /stats      request, batch and cache counters as JSON
+"""
+import json
+import secrets
+import asyncio
+import argparse
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import monty_hall_pb2
+from counter_rng import MAX_SPAN, CounterRNG
+from monty_hall import DEFAULT_CHUNK_SIZE, TEST_DRAWS, run_vectorized_segments
+
+PROTOBUF_TYPE = 'application/x-protobuf'
+
+# Largest accepted request body
+MAX_BODY_BYTES = 1 << 16
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+                500: 'Internal Server Error'}
+
+class LRUCache:
+    """
+    Least-recently-used cache of simulation results, with hit counters.
+    """
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def put(self, key, value) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def run_batch(num_doors: int, seed: int, first_test: int, sizes: list, chunk_size: int) -> list:
+    """
+    Run consecutive segments of tests as one vectorized run.
+
+    @return: (win_switch, win_no_switch) for every segment
+    """
+    rng = CounterRNG(seed, TEST_DRAWS * first_test)
+    return run_vectorized_segments(sizes, num_doors, rng, chunk_size)
+
+def parse_request(fields: dict, max_tests: int) -> tuple:
+    """
+    Validate the fields of a query.
+
+    @return: (doors, num_tests, seed, first_test, fresh), seed None for unseeded queries
+    """
+    try:
+        doors = int(fields.get('doors', 3))
+        num_tests = int(float(fields.get('num_tests', 100000)))
+        seed = fields.get('seed')
+        seed = int(seed) if seed not in (None, '') else None
+        first_test = int(float(fields.get('first_test', 0)))
+    except (TypeError, ValueError):
+        raise ValueError("doors, num_tests, seed and first_test must be integers")
+    fresh = fields.get('fresh', False)
+    if isinstance(fresh, str):
+        fresh = fresh.lower() in ('1', 'true', 'yes')
+
+    if doors < 3:
+        raise ValueError("Number of doors must be >= 3")
+    if doors > MAX_SPAN:
+        raise ValueError(f"Number of doors must be <= {MAX_SPAN}")
+    if not 0 < num_tests <= max_tests:
+        raise ValueError(f"Number of tests must be between 1 and {max_tests}")
+    if seed is not None and seed < 0:
+        raise ValueError("Seed must be non-negative")
+    if first_test < 0:
+        raise ValueError("First test must be non-negative")
+    if seed is None and first_test:
+        raise ValueError("first_test needs a seed")
+    return doors, num_tests, seed, first_test, bool(fresh)
+
+class SimulationService:
+    """
+    Batches and caches simulation queries; transport-independent.
+    """
+    def __init__(self, seed: int = None, batch_window: float = 0.002, cache_size: int = 1024,
+                 workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE, verbose: bool = False):
+        """
+        @param seed: Seed of the stream unseeded queries run on; drawn at random when not given
+        @param batch_window: Seconds to wait for more queries before running a batch
+        @param cache_size: Number of results kept in the LRU cache
+        @param workers: Threads running batches
+        """
+        self.seed = seed if seed is not None else secrets.randbits(63)
+        self.batch_window = batch_window
+        self.chunk_size = chunk_size
+        self.verbose = verbose
+        self.cache = LRUCache(cache_size)
+        self.requests = 0
+        self.batches = 0
+        self.tests_run = 0
+        # Next unused test of the service's stream
+        self._next_test = 0
+        self._pending = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+
+    async def simulate(self, doors: int, num_tests: int, seed: int = None, first_test: int = 0, fresh: bool = False) -> dict:
+        """
+        Answer one query, from the cache or as part of the next batch.
+        """
+        self.requests += 1
+        key = (doors, num_tests, seed, first_test)
+        if not fresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return dict(cached, cached=True)
+
+        loop = asyncio.get_running_loop()
+        # Unseeded queries all draw from the service's stream, so any of them can share a run
+        batch_key = (doors, seed, first_test)
+        future = loop.create_future()
+        pending = self._pending.setdefault(batch_key, [])
+        pending.append((num_tests, future))
+        if len(pending) == 1:
+            loop.call_later(self.batch_window, self._flush, batch_key)
+
+        result = await future
+        self.cache.put(key, result)
+        return result
+
+    def _flush(self, batch_key: tuple) -> None:
+        asyncio.ensure_future(self._run(batch_key, self._pending.pop(batch_key)))
+
+    async def _run(self, batch_key: tuple, pending: list) -> None:
+        doors, seed, first_test = batch_key
+        sizes = [num_tests for num_tests, _ in pending]
+        if seed is None:
+            # Every query gets its own range of the service's stream
+            seed, first_test = self.seed, self._next_test
+            segments = sizes
+            self._next_test += sum(sizes)
+        else:
+            # Queries on the same range are prefixes of its longest one
+            lengths = sorted(set(sizes))
+            segments = [b - a for a, b in zip([0] + lengths, lengths)]
+
+        try:
+            counts = await asyncio.get_running_loop().run_in_executor(
+                self._executor, run_batch, doors, seed, first_test, segments, self.chunk_size)
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.tests_run += sum(segments)
+        if self.verbose : print(f"Batch of {len(pending)} queries: {sum(segments):,} tests on {doors} doors")
+
+        if batch_key[1] is None:
+            starts = [first_test]
+            for size in sizes[:-1]:
+                starts.append(starts[-1] + size)
+            answers = [(start, *wins) for start, wins in zip(starts, counts)]
+        else:
+            # Win counts for each distinct length, accumulated over the segments
+            totals, win_s, win_n = {}, 0, 0
+            for length, (s, n) in zip(lengths, counts):
+                win_s, win_n = win_s + s, win_n + n
+                totals[length] = (win_s, win_n)
+            answers = [(first_test, *totals[num_tests]) for num_tests in sizes]
+
+        for (num_tests, future), (start, win_s, win_n) in zip(pending, answers):
+            if not future.done():
+                future.set_result({
+                    'doors': doors,
+                    'num_tests': num_tests,
+                    'seed': seed,
+                    'first_test': start,
+                    'win_switch': win_s,
+                    'win_no_switch': win_n,
+                    'switch_rate': win_s / num_tests,
+                    'stay_rate': win_n / num_tests,
+                    'cached': False,
+                    'batch_size': len(pending),
+                })
+
+    def stats(self) -> dict:
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'tests_run': self.tests_run,
+            'cache_hits': self.cache.hits,
+            'cache_misses': self.cache.misses,
+            'cache_entries': len(self.cache),
+            'service_seed': self.seed,
+            'stream_position': self._next_test,
+        }
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def encode_result(result: dict, protobuf: bool) -> tuple:
+    """
+    @return: (content type, body) of a result in the requested format
+    """
+    if protobuf:
+        return PROTOBUF_TYPE, monty_hall_pb2.SimulationResult(**result).SerializeToString()
+    return 'application/json', json.dumps(result).encode()
+
+def decode_request(body: bytes, content_type: str) -> dict:
+    if content_type == PROTOBUF_TYPE:
+        message = monty_hall_pb2.SimulationRequest()
+        message.ParseFromString(body)
+        fields = {'doors': message.doors or 3, 'num_tests': message.num_tests or 100000,
+                  'first_test': message.first_test, 'fresh': message.fresh}
+        if message.HasField('seed'):
+            fields['seed'] = message.seed
+        return fields
+    try:
+        fields = json.loads(body or b'{}')
+    except ValueError:
+        raise HTTPError(400, "Body is not valid JSON")
+    if not isinstance(fields, dict):
+        raise HTTPError(400, "Body must be a JSON object")
+    return fields
+
+async def handle_request(service: SimulationService, method: str, target: str, headers: dict, body: bytes,
+                         max_tests: int) -> tuple:
+    """
+    @return: (status, content type, body) of the response
+    """
+    url = urlsplit(target)
+    if url.path == '/stats':
+        if method != 'GET':
+            raise HTTPError(405, "Use GET for /stats")
+        return 200, 'application/json', json.dumps(service.stats()).encode()
+    if url.path != '/simulate':
+        raise HTTPError(404, f"No such endpoint: {url.path}")
+
+    content_type = headers.get('content-type', '').split(';')[0].strip()
+    if method == 'GET':
+        fields = dict(parse_qsl(url.query))
+    elif method == 'POST':
+        fields = decode_request(body, content_type)
+    else:
+        raise HTTPError(405, "Use GET or POST for /simulate")
+
+    try:
+        query = parse_request(fields, max_tests)
+    except ValueError as e:
+        raise HTTPError(400, str(e))
+    result = await service.simulate(*query)
+    protobuf = PROTOBUF_TYPE in (content_type, headers.get('accept', ''))
+    return (200, *encode_result(result, protobuf))
+
+async def serve_connection(service: SimulationService, max_tests: int, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> None:
+    """
+    Serve HTTP/1.1 requests on one connection until the client closes it.
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            try:
+                method, target, version = request_line.decode('latin-1').split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+            try:
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    # The body can't be framed, so neither can the next request
+                    keep_alive = False
+                    raise HTTPError(400, "Invalid Content-Length")
+                if length > MAX_BODY_BYTES:
+                    keep_alive = False
+                    raise HTTPError(413, "Request body too large")
+                body = await reader.readexactly(length) if length else b''
+                status, content_type, payload = await handle_request(service, method, target, headers, body, max_tests)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except HTTPError as e:
+                status, content_type, payload = e.status, 'application/json', json.dumps({'error': str(e)}).encode()
+            except Exception:
+                status, content_type, payload = 500, 'application/json', json.dumps({'error': "Internal server error"}).encode()
+
+            writer.write((f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+                          f"Content-Type: {content_type}\r\n"
+                          f"Content-Length: {len(payload)}\r\n"
+                          f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + payload)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+async def serve(service: SimulationService, host: str, port: int, max_tests: int) -> None:
+    server = await asyncio.start_server(
+        lambda reader, writer: serve_connection(service, max_tests, reader, writer), host, port)
+    print(f"Serving Monty Hall simulations on http://{host}:{port} (service seed {service.seed})")
+    async with server:
+        await server.serve_forever()
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Serve Monty Hall simulations over HTTP, batching concurrent queries into shared vectorized runs.',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--host',
+                       default='127.0.0.1',
+                       help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('-p', '--port',
+                       type=int,
+                       default=8754,
+                       help='Port to listen on (default: 8754)')
+    parser.add_argument('-s', '--seed',
+                       type=int,
+                       default=None,
+                       help='Seed of the stream unseeded queries run on (default: random)')
+    parser.add_argument('--batch-window',
+                       type=float,
+                       default=2.0,
+                       help='Milliseconds to wait for queries to batch together (default: 2)')
+    parser.add_argument('--cache-size',
+                       type=int,
+                       default=1024,
+                       help='Results kept in the LRU cache, 0 to disable it (default: 1024)')
+    parser.add_argument('--max-tests',
+                       type=float,
+                       default=1e9,
+                       help='Largest number of tests a single query may ask for (default: 1e9)')
+    parser.add_argument('-w', '--workers',
+                       type=int,
+                       default=1,
+                       help='Threads running batches (default: 1)')
+    parser.add_argument('--chunk-size',
+                       type=int,
+                       default=DEFAULT_CHUNK_SIZE,
+                       help=f'Tests per vectorized chunk (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('-v', '--verbose',
+                       action='store_true',
+                       help='Print every batch that runs')
+    args = parser.parse_args()
+
+    if args.batch_window < 0:
+        parser.error("Batch window must be non-negative")
+    if args.workers < 1:
+        parser.error("Number of workers must be positive")
+    if args.chunk_size < 1:
+        parser.error("Chunk size must be positive")
+    if args.seed is not None and args.seed < 0:
+        parser.error("Seed must be non-negative")
+    args.max_tests = int(args.max_tests)
+    return args
+
+if __name__ == '__main__':
+    args = parse_args()
+    service = SimulationService(args.seed, args.batch_window / 1000, args.cache_size, args.workers,
+                                args.chunk_size, args.verbose)
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.max_tests))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Parameter sweeps over the Monty Hall simulators, with a persistent result cache.
+
+Every grid point is a (method, doors, seed, num_tests) combination. Results are
+stored in an SQLite cache; a point that is already cached is reused, and a point
+with more tests than a cached one only runs the missing tests. Because tests are
+addressed by index in a counter-based stream (see monty_hall.run_trial_range),
+an extended result is identical to one computed from scratch.
+"""
+import sys
+import csv
+import time
+import sqlite3
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from counter_rng import MAX_SPAN
+from monty_hall import run_trial_range
+
+# Methods that can be addressed by test index, and so swept and cached
+SWEEP_METHODS = ('deduction', 'physical', 'compact', 'vectorized')
+
+# Largest number of tests handed to one worker at a time
+TASK_SIZE = 1 << 24
+
+# Bumped whenever the random streams behind run_trial_range change, which
+# makes every previously cached result stale
+CACHE_VERSION = 2
+
+COLUMNS = ('method', 'doors', 'seed', 'num_tests', 'win_switch', 'win_no_switch', 'switch_rate', 'stay_rate', 'cached')
+
+class ResultCache:
+    """
+    On-disk cache of simulation results keyed by (method, doors, seed, num_tests).
+    """
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            self.connection.execute("DROP TABLE IF EXISTS results")
+            self.connection.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " method TEXT, doors INTEGER, seed INTEGER, num_tests INTEGER,"
+            " win_switch INTEGER, win_no_switch INTEGER,"
+            " PRIMARY KEY (method, doors, seed, num_tests))")
+
+    def get(self, method: str, doors: int, seed: int, num_tests: int):
+        """
+        Look up an exact result.
+
+        @return: (win_switch, win_no_switch), or None if not cached
+        """
+        return self.connection.execute(
+            "SELECT win_switch, win_no_switch FROM results"
+            " WHERE method = ? AND doors = ? AND seed = ? AND num_tests = ?",
+            (method, doors, seed, num_tests)).fetchone()
+
+    def longest_prefix(self, method: str, doors: int, seed: int, num_tests: int):
+        """
+        Find the cached result with the most tests, but no more than num_tests.
+
+        @return: (num_tests, win_switch, win_no_switch), or None if nothing is cached
+        """
+        return self.connection.execute(
+            "SELECT num_tests, win_switch, win_no_switch FROM results"
+            " WHERE method = ? AND doors = ? AND seed = ? AND num_tests <= ?"
+            " ORDER BY num_tests DESC LIMIT 1",
+            (method, doors, seed, num_tests)).fetchone()
+
+    def put(self, method: str, doors: int, seed: int, num_tests: int, win_switch: int, win_no_switch: int):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+            (method, doors, seed, num_tests, win_switch, win_no_switch))
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+def parse_int_list(text: str) -> List[int]:
+    """
+    Parse a comma-separated list of integers. Scientific notation (1e6) and
+    inclusive ranges (3-10) are accepted.
+    """
+    values = []
+    for item in text.split(','):
+        item = item.strip()
+        if '-' in item and not item.startswith('-'):
+            low, high = item.split('-')
+            values.extend(range(int(float(low)), int(float(high)) + 1))
+        else:
+            values.append(int(float(item)))
+    return values
+
+def _run_task(task: Tuple[str, int, int, int, int]) -> Tuple[int, int]:
+    method, doors, seed, start, stop = task
+    return run_trial_range(method, doors, seed, start, stop)
+
+def plan_tasks(segments: List[Tuple[str, int, int, int, int]]) -> List[Tuple[int, Tuple[str, int, int, int, int]]]:
+    """
+    Split test ranges into tasks of at most TASK_SIZE tests, cut on
+    TASK_SIZE boundaries so they spread evenly over the worker pool.
+
+    @return: List of (segment index, task) pairs
+    """
+    tasks = []
+    for index, (method, doors, seed, start, stop) in enumerate(segments):
+        while start < stop:
+            end = min(stop, (start // TASK_SIZE + 1) * TASK_SIZE)
+            tasks.append((index, (method, doors, seed, start, end)))
+            start = end
+    return tasks
+
+def run_sweep(methods: List[str], doors: List[int], seeds: List[int], num_tests: List[int],
+              cache: ResultCache, workers: int = 1) -> List[Dict]:
+    """
+    Compute every point of the grid, reusing and extending cached results.
+
+    @return: One row per grid point, as a dict keyed by COLUMNS
+    """
+    rows = {}
+    # Test ranges still to run: (method, doors, seed, start, stop)
+    segments = []
+    # Per segment, the counts it extends: a cached (win_switch, win_no_switch)
+    # pair, or None to extend the previous segment of the same series
+    bases = []
+
+    for method in methods:
+        for num_doors in doors:
+            for seed in seeds:
+                # Walk the series in increasing num_tests so that each new
+                # point only runs the tests past the previous one
+                covered, base = 0, (0, 0)
+                for n in sorted(set(num_tests)):
+                    hit = cache.get(method, num_doors, seed, n)
+                    if hit is not None:
+                        rows[(method, num_doors, seed, n)] = (hit[0], hit[1], True)
+                        covered, base = n, hit
+                        continue
+                    prefix = cache.longest_prefix(method, num_doors, seed, n)
+                    if prefix is not None and prefix[0] > covered:
+                        covered, base = prefix[0], prefix[1:]
+                    segments.append((method, num_doors, seed, covered, n))
+                    bases.append(base)
+                    covered, base = n, None
+
+    tasks = plan_tasks(segments)
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_task, [task for _, task in tasks]))
+    else:
+        results = [_run_task(task) for _, task in tasks]
+
+    segment_counts = [[0, 0] for _ in segments]
+    for (index, _), (win_s, win_n) in zip(tasks, results):
+        segment_counts[index][0] += win_s
+        segment_counts[index][1] += win_n
+
+    totals = None
+    for (method, num_doors, seed, _, n), base, (win_s, win_n) in zip(segments, bases, segment_counts):
+        if base is not None:
+            totals = list(base)
+        totals[0] += win_s
+        totals[1] += win_n
+        cache.put(method, num_doors, seed, n, totals[0], totals[1])
+        rows[(method, num_doors, seed, n)] = (totals[0], totals[1], False)
+
+    table = []
+    for (method, num_doors, seed, n), (win_s, win_n, cached) in sorted(rows.items()):
+        table.append({
+            'method': method, 'doors': num_doors, 'seed': seed, 'num_tests': n,
+            'win_switch': win_s, 'win_no_switch': win_n,
+            'switch_rate': win_s / n, 'stay_rate': win_n / n, 'cached': cached,
+        })
+    return table
+
+def write_csv(table: List[Dict], out) -> None:
+    writer = csv.DictWriter(out, fieldnames=COLUMNS)
+    writer.writeheader()
+    writer.writerows(table)
+
+def write_columnar(table: List[Dict], path: str) -> None:
+    """
+    Write the table column by column to a NumPy .npz archive, one typed
+    array per column, the way columnar formats such as Parquet lay data out.
+    """
+    columns = {name: np.array([row[name] for row in table]) for name in COLUMNS}
+    np.savez(path, **columns)
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Sweep the Monty Hall simulators over a grid of parameters, caching every result.',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('-m', '--methods',
+                       default='vectorized',
+                       help=f'Comma-separated methods to sweep, from {", ".join(SWEEP_METHODS)} (default: vectorized)')
+    parser.add_argument('-d', '--doors',
+                       default='3',
+                       help='Comma-separated door counts; ranges such as 3-10 and 1e6 are allowed (default: 3)')
+    parser.add_argument('-n', '--num-tests',
+                       default='100000',
+                       help='Comma-separated test counts (default: 100000)')
+    parser.add_argument('-s', '--seeds',
+                       default='0',
+                       help='Comma-separated seeds (default: 0)')
+    parser.add_argument('-w', '--workers',
+                       type=int,
+                       default=1,
+                       help='Number of worker processes (default: 1)')
+    parser.add_argument('--cache',
+                       default='monty_sweep_cache.sqlite',
+                       help='Result cache file (default: monty_sweep_cache.sqlite)')
+    parser.add_argument('-o', '--output',
+                       default='-',
+                       help='Output file; .npz writes a columnar archive, anything else CSV (default: - for stdout)')
+    args = parser.parse_args()
+
+    args.methods = [method.strip() for method in args.methods.split(',')]
+    for method in args.methods:
+        if method not in SWEEP_METHODS:
+            parser.error(f"Unknown method {method!r}; choose from {', '.join(SWEEP_METHODS)}")
+    try:
+        args.doors = parse_int_list(args.doors)
+        args.num_tests = parse_int_list(args.num_tests)
+        args.seeds = parse_int_list(args.seeds)
+    except ValueError as e:
+        parser.error(f"Invalid grid specification: {e}")
+    if min(args.doors) < 3:
+        parser.error("Number of doors must be >= 3")
+    if max(args.doors) > MAX_SPAN:
+        parser.error(f"Number of doors must be <= {MAX_SPAN}")
+    if min(args.num_tests) < 1:
+        parser.error("Number of tests must be positive")
+    if min(args.seeds) < 0:
+        parser.error("Seeds must be non-negative")
+    if args.workers < 1:
+        parser.error("Number of workers must be positive")
+    return args
+
+if __name__ == '__main__':
+    start_time = time.time()
+    args = parse_args()
+
+    cache = ResultCache(args.cache)
+    try:
+        table = run_sweep(args.methods, args.doors, args.seeds, args.num_tests, cache, args.workers)
+    finally:
+        cache.close()
+
+    if args.output.endswith('.npz'):
+        write_columnar(table, args.output)
+    elif args.output == '-':
+        write_csv(table, sys.stdout)
+    else:
+        with open(args.output, 'w', newline='') as out:
+            write_csv(table, out)
+
+    hits = sum(row['cached'] for row in table)
+    print(f"{len(table)} points ({hits} from cache) in {time.time() - start_time:.2f}s", file=sys.stderr)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Compact binary traces of Monty Hall simulations.
+
+A trace holds one fixed-size record per traced test (test index, car, first
+pick, door the host kept closed, final selection and whether it won). The
+writer buffers records in a NumPy array and writes them in bulk, and can
+sample, e.g. trace only every 10,000th test. Run this module as a script to
+turn a trace back into the same text the simulator prints with -v.
+
+File layout: MAGIC, a little-endian uint32 header length, a JSON header
+describing the run, then the packed records.
+"""
+import sys
+import json
+import struct
+import argparse
+from typing import Iterator
+
+import numpy as np
+
+MAGIC = b'MONTYTR1'
+
+TRACE_DTYPE = np.dtype([
+    ('test', '<u8'),
+    ('car', '<u4'),
+    ('pick', '<u4'),
+    ('kept', '<u4'),
+    ('selection', '<u4'),
+    ('win', 'u1'),
+])
+
+# Records held in memory before they are written out
+DEFAULT_BUFFER_RECORDS = 1 << 16
+
+class TraceWriter:
+    """
+    Buffered writer for trace records.
+    """
+    def __init__(self, path: str, num_doors: int, switch: bool, sample: int = 1, first_test: int = 0,
+                 buffer_records: int = DEFAULT_BUFFER_RECORDS, **metadata):
+        """
+        @param path: File to write
+        @param num_doors: Number of doors in every traced game
+        @param switch: Whether the traced player switches
+        @param sample: Trace only the tests whose index is a multiple of this
+        @param first_test: Index of the run's first test; record indices are absolute
+        @param metadata: Extra JSON-serialisable fields for the header, e.g. the seed
+        """
+        if sample < 1:
+            raise ValueError("Trace sample interval must be positive")
+        self.sample = sample
+        self.first_test = first_test
+        self.records = 0
+        self._buffer = np.zeros(buffer_records, dtype=TRACE_DTYPE)
+        self._used = 0
+
+        header = json.dumps(dict(metadata, num_doors=num_doors, switch=switch, sample=sample)).encode()
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC + struct.pack('<I', len(header)) + header)
+
+    def __enter__(self) -> 'TraceWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def sampled(self, i: int) -> bool:
+        """
+        Whether test i of the run (counting from its first test) is traced.
+        """
+        return (self.first_test + i) % self.sample == 0
+
+    def sampled_slice(self, offset: int, size: int) -> slice:
+        """
+        The traced tests among tests offset..offset+size-1 of the run, as a
+        slice into a batch holding exactly those tests.
+        """
+        first = -(self.first_test + offset) % self.sample
+        return slice(first, size, self.sample)
+
+    def record(self, i: int, car: int, pick: int, kept: int, selection: int) -> None:
+        """
+        Add one traced test; i counts from the run's first test.
+        """
+        if self._used == self._buffer.size:
+            self.flush()
+        self._buffer[self._used] = (self.first_test + i, car, pick, kept, selection, selection == car)
+        self._used += 1
+        self.records += 1
+
+    def record_batch(self, offset: int, car: np.ndarray, pick: np.ndarray, kept: np.ndarray, selection: np.ndarray) -> None:
+        """
+        Add a batch of traced tests, already selected with sampled_slice
+        from a batch starting at test offset of the run.
+        """
+        tests = self.first_test + offset + np.arange(car.size, dtype=np.uint64) * self.sample
+        tests += np.uint64(-(self.first_test + offset) % self.sample)
+        for start in range(0, car.size, self._buffer.size):
+            stop = min(start + self._buffer.size, car.size)
+            if self._used + stop - start > self._buffer.size:
+                self.flush()
+            rows = self._buffer[self._used:self._used + stop - start]
+            rows['test'] = tests[start:stop]
+            rows['car'] = car[start:stop]
+            rows['pick'] = pick[start:stop]
+            rows['kept'] = kept[start:stop]
+            rows['selection'] = selection[start:stop]
+            rows['win'] = selection[start:stop] == car[start:stop]
+            self._used += stop - start
+        self.records += car.size
+
+    def flush(self) -> None:
+        self._file.write(self._buffer[:self._used].tobytes())
+        self._used = 0
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+def read_header(f) -> dict:
+    """
+    Read and check a trace header, leaving f at the first record.
+    """
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a Monty Hall trace file")
+    (length,) = struct.unpack('<I', f.read(4))
+    return json.loads(f.read(length))
+
+def read_records(f, block: int = DEFAULT_BUFFER_RECORDS) -> Iterator[np.ndarray]:
+    """
+    Yield the records after the header in blocks, so traces of any size can
+    be read in constant memory.
+    """
+    while True:
+        records = np.fromfile(f, dtype=TRACE_DTYPE, count=block)
+        if records.size == 0:
+            return
+        yield records
+
+def print_trace(path: str, compact: bool = False, limit: int = None, out=sys.stdout) -> None:
+    """
+    Print a trace in the format the simulator uses for -v.
+
+    @param compact: Describe the revealed doors as "all doors except ..." instead of listing them
+    @param limit: Stop after this many tests
+    """
+    with open(path, 'rb') as f:
+        header = read_header(f)
+        num_doors = header['num_doors']
+        switch = header['switch']
+        printed = 0
+
+        print('----- Simulation Start -----', file=out)
+        for records in read_records(f):
+            for test, car, pick, kept, selection, win in records.tolist():
+                if limit is not None and printed >= limit:
+                    return
+                if compact:
+                    revealed = f"all doors except {min(pick, kept)} and {max(pick, kept)}"
+                else:
+                    revealed = str([door for door in range(1, num_doors + 1) if door != pick and door != kept])
+                print(f"\n--- Test {test + 1} ---", file=out)
+                print(f"Car door           = {car}", file=out)
+                print(f"The door you chose = {pick}", file=out)
+                print(f"Revealed (goats)   = {revealed}", file=out)
+                print(f"Switch             = {switch}", file=out)
+                if win:
+                    print("You win!", file=out)
+                else:
+                    print("Sorry, you lose! (Alternatively, if you were trying to get the goat, you win!)", file=out)
+                printed += 1
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Print a Monty Hall trace file in the simulator\'s verbose format.',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('trace',
+                       help='Trace file written with monty_hall.py --trace')
+    parser.add_argument('--compact',
+                       action='store_true',
+                       help='Describe the revealed doors instead of listing every one')
+    parser.add_argument('--limit',
+                       type=int,
+                       default=None,
+                       help='Print at most this many tests')
+    parser.add_argument('--header',
+                       action='store_true',
+                       help='Print the trace header as JSON and exit')
+    return parser.parse_args()
+
+if __name__ == '__main__':
+    args = parse_args()
+    try:
+        if args.header:
+            with open(args.trace, 'rb') as f:
+                print(json.dumps(read_header(f), indent=2))
+        else:
+            print_trace(args.trace, args.compact, args.limit)
+    except BrokenPipeError:
+        pass
@@ -0,0 +1,103 @@
+"""
+Mixed switching policies for the Monty Hall problem.
+
+A policy switches with some probability, which may depend on the door you
+picked first. Evaluating a policy only needs, for each group of first picks
+it treats alike, how many games there were and how many of them the first
+pick won, so a whole grid of policies is evaluated from one set of car and
+pick draws: the draws are common random numbers shared by every policy.
+
+The switching coin itself isn't drawn. A policy's result is its expected win
+rate given the cars and picks, which has lower variance than flipping the
+coin and makes differences between policies depend only on the games in
+which the first pick won or lost.
+"""
+from typing import Dict, List
+
+import numpy as np
+
+class SwitchPolicy:
+    """
+    Switch with probability switch_prob, or by_door[d] when the first pick was door d.
+    """
+    def __init__(self, switch_prob: float, by_door: Dict[int, float] = None, name: str = None):
+        by_door = by_door or {}
+        for p in (switch_prob, *by_door.values()):
+            if not 0 <= p <= 1:
+                raise ValueError("Switching probabilities must be between 0 and 1")
+        self.switch_prob = switch_prob
+        self.by_door = by_door
+        self.name = name or describe_policy(switch_prob, by_door)
+
+    def probabilities(self, doors: np.ndarray) -> np.ndarray:
+        """
+        Switching probability for each of the given first picks.
+        """
+        return np.array([self.by_door.get(int(door), self.switch_prob) for door in doors])
+
+def describe_policy(switch_prob: float, by_door: Dict[int, float]) -> str:
+    if not by_door:
+        return f"p={switch_prob:g}"
+    return ','.join([f"{door}={p:g}" for door, p in sorted(by_door.items())] + [f"*={switch_prob:g}"])
+
+def parse_policy(spec: str, num_doors: int) -> SwitchPolicy:
+    """
+    Parse a policy: a switching probability such as "0.5", or per-door
+    probabilities such as "1=0,2=1,*=0.5" (* covers every door not listed,
+    and defaults to 1).
+    """
+    if '=' not in spec:
+        return SwitchPolicy(float(spec))
+    switch_prob, by_door = 1.0, {}
+    for part in spec.split(','):
+        door, _, p = part.partition('=')
+        if door.strip() == '*':
+            switch_prob = float(p)
+            continue
+        door = int(door)
+        if not 1 <= door <= num_doors:
+            raise ValueError(f"Door {door} is not between 1 and {num_doors}")
+        by_door[door] = float(p)
+    return SwitchPolicy(switch_prob, by_door)
+
+def policy_grid(points: int) -> List[SwitchPolicy]:
+    """
+    Policies switching with probability 0, 1/(points-1), ..., 1.
+    """
+    return [SwitchPolicy(p) for p in np.linspace(0, 1, points)]
+
+def singled_out_doors(policies: List[SwitchPolicy]) -> np.ndarray:
+    """
+    Sorted doors that some policy treats differently from the rest.
+    """
+    return np.array(sorted({door for policy in policies for door in policy.by_door}), dtype=np.int64)
+
+def evaluate_policies(policies: List[SwitchPolicy], games: np.ndarray, stay_wins: np.ndarray, baseline: int = None):
+    """
+    Win rates of every policy from per-group counts.
+
+    @param games: Games per group: one per singled-out door, then one for all other doors
+    @param stay_wins: Games per group won by the first pick
+    @param baseline: Index of the policy the others are compared with
+    @return: (rates, standard errors, differences from the baseline, standard errors of the differences)
+    """
+    doors = singled_out_doors(policies)
+    num_tests = games.sum()
+    # Switching probability of every policy in every group
+    q = np.array([np.append(policy.probabilities(doors), policy.switch_prob) for policy in policies])
+    switch_wins = games - stay_wins
+
+    # Expected wins of a game are q if the first pick missed and 1 - q if it won
+    rates = (q * switch_wins + (1 - q) * stay_wins).sum(axis=1) / num_tests
+    second_moments = (q ** 2 * switch_wins + (1 - q) ** 2 * stay_wins).sum(axis=1) / num_tests
+    errors = np.sqrt(np.maximum(second_moments - rates ** 2, 0) / num_tests)
+
+    if baseline is None:
+        return rates, errors, None, None
+    # With common draws, two policies only differ by (q_a - q_b) per game,
+    # with the sign of whether the first pick won
+    delta = q - q[baseline]
+    differences = rates - rates[baseline]
+    difference_moments = (delta ** 2 * games).sum(axis=1) / num_tests
+    difference_errors = np.sqrt(np.maximum(difference_moments - differences ** 2, 0) / num_tests)
+    return rates, errors, differences, difference_errors